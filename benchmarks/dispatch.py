@@ -0,0 +1,106 @@
+"""
+Measures the per-frame overhead of CommandHandler.handle, forge_command and forge_command_bytes.
+
+Each case is timed for the dispatch tables now used by CommandHandler and for the
+historical dispatch, which looked the callbacks up in several dictionaries and formatted
+its debug messages whether debug logging was enabled or not, and for the historical
+forging, concatenating strings later encoded by write(). Debug logging is disabled,
+as in production, unless --debug is given (the messages then go to a null handler).
+
+Usage: python benchmarks/dispatch.py [--number N] [--debug]
+"""
+import argparse
+import logging
+import timeit
+
+from commanduino.commandhandler import CommandHandler
+
+
+class LegacyCommandHandler(CommandHandler):
+    """Reproduces the historical dispatch and logging."""
+    def handle_tokens(self, cmd_list, cmd=None):
+        cmd_id = cmd_list[0]
+        self.logger.debug('Handling {}'.format(cmd_list),
+                          extra={'cmd_list': cmd_list,
+                                 'cmd_id': cmd_id})
+        if cmd_id in self.handlers:
+            for clb in self.handlers[cmd_id]:
+                self.logger.debug('Found callback for "{}"'.format(cmd_id),
+                                  extra={'callback_function': clb})
+                clb(*cmd_list[1:])
+        elif cmd_id in self.routes or cmd_id in self.relays:
+            for clb in self.routes.get(cmd_id, ()):
+                self.logger.debug('Found route for "{}"'.format(cmd_id),
+                                  extra={'route_function': clb})
+                clb(cmd_list[1:])
+            for clb in self.relays.get(cmd_id, ()):
+                self.logger.debug('Found relay for "{}"'.format(cmd_id),
+                                  extra={'relay_function': clb})
+                clb(self.build_remaining(cmd_list))
+        else:
+            self.logger.debug('No callback assigned to "{}", defaulting'.format(cmd_id))
+            if cmd is None:
+                cmd = self.delim.join(cmd_list)
+            for clb in self.default_handlers:
+                clb(cmd)
+
+    def forge_command(self, command_id, *args):
+        cmd = self.cmd_header
+        cmd += command_id
+        for arg in args:
+            cmd += self.delim
+            if type(arg) == float:
+                cmd += str(round(arg, self.cmd_decimal))
+            else:
+                cmd += str(arg)
+        cmd += self.term
+        self.logger.debug('Forged "{}"'.format(cmd),
+                          extra={'command_id': command_id,
+                                 'arguments': args})
+        return cmd
+
+    def forge_command_bytes(self, command_id, *args):
+        return self.forge_command(command_id, *args).encode()
+
+
+def make_handler(handler_class):
+    handler = handler_class()
+    for i in range(20):
+        handler.add_command(f'C{i}', lambda *args: None)
+        handler.add_route(f'D{i}', lambda args: None)
+    handler.add_default_handler(lambda cmd: None)
+    handler.set_command_header('D1')
+    return handler
+
+
+CASES = (
+    ('callback', lambda handler: handler.handle('C7,1.25;')),
+    ('route', lambda handler: handler.handle('D7,T,21.50;')),
+    ('default', lambda handler: handler.handle('X,1;')),
+    ('forge', lambda handler: handler.forge_command('M', 1.2345, 200)),
+    ('forge b', lambda handler: handler.forge_command_bytes('M', 1.2345, 200)),
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--number', type=int, default=200000, help='number of calls per case')
+    parser.add_argument('--debug', action='store_true', help='enable debug logging')
+    args = parser.parse_args()
+
+    root = logging.getLogger('commanduino')
+    root.setLevel(logging.DEBUG if args.debug else logging.INFO)
+    root.propagate = False
+
+    handlers = {name: make_handler(handler_class)
+                for name, handler_class in (('legacy', LegacyCommandHandler), ('tables', CommandHandler))}
+    for case, call in CASES:
+        results = []
+        for name, handler in handlers.items():
+            best = min(timeit.repeat(lambda: call(handler), number=args.number, repeat=3))
+            results.append(f'{name} {best / args.number * 1e9:7.0f} ns')
+        print(f'{case:>9}: ' + ', '.join(results))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Measures the CPU used by idle command handlers.
+
+Starts many SerialCommandHandler (on pseudo terminals) and TCPIPCommandHandler (on
+local sockets) instances that never receive any data, and reports the process CPU
+time spent while they wait, both for the selector based reader and for the legacy
+10 ms timeout polling loop. POSIX only, pseudo terminals are needed.
+
+Usage: python benchmarks/idle_cpu.py [n_handlers] [duration]
+"""
+import os
+import pty
+import sys
+import time
+import socket
+import tty
+
+from commanduino.commandhandler import SerialCommandHandler, TCPIPCommandHandler
+
+
+class PollingSerialCommandHandler(SerialCommandHandler):
+    """Reproduces the historical timeout polling reader loop."""
+    def run(self):
+        self.interrupted.acquire()
+        while self.interrupted.locked():
+            self.process_serial(self._serial)
+        self.close()
+
+
+class PollingTCPIPCommandHandler(TCPIPCommandHandler):
+    """Reproduces the historical timeout polling reader loop."""
+    def run(self):
+        while not self.interrupted.is_set():
+            self.process_data()
+        self.close()
+
+
+def make_handlers(n_handlers, serial_class, tcpip_class, server):
+    handlers, keep_alive = [], []
+    for i in range(n_handlers):
+        if i % 2:
+            master, slave = pty.openpty()
+            tty.setraw(slave)
+            keep_alive += [master, slave]
+            handlers.append(serial_class(os.ttyname(slave)))
+        else:
+            handlers.append(tcpip_class(str(server.getsockname()[1]), '127.0.0.1'))
+            keep_alive.append(server.accept()[0])
+    return handlers, keep_alive
+
+
+def measure(n_handlers, duration, serial_class, tcpip_class):
+    server = socket.socket()
+    server.bind(('127.0.0.1', 0))
+    server.listen(n_handlers)
+    handlers, keep_alive = make_handlers(n_handlers, serial_class, tcpip_class, server)
+    for handler in handlers:
+        handler.start()
+    time.sleep(0.2)
+
+    cpu_start = time.process_time()
+    time.sleep(duration)
+    cpu = time.process_time() - cpu_start
+
+    start = time.perf_counter()
+    for handler in handlers:
+        handler.stop()
+    for handler in handlers:
+        handler.join()
+    shutdown = time.perf_counter() - start
+
+    for item in keep_alive:
+        item.close() if isinstance(item, socket.socket) else os.close(item)
+    server.close()
+    return cpu, shutdown
+
+
+def main():
+    n_handlers = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    duration = float(sys.argv[2]) if len(sys.argv) > 2 else 5
+    for name, classes in (('polling', (PollingSerialCommandHandler, PollingTCPIPCommandHandler)),
+                          ('selector', (SerialCommandHandler, TCPIPCommandHandler))):
+        cpu, shutdown = measure(n_handlers, duration, *classes)
+        print(f'{name:>10}: {n_handlers} idle handlers used {100 * cpu / duration:6.2f} % CPU, '
+              f'stopped in {shutdown * 1e3:.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
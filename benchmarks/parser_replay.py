@@ -0,0 +1,80 @@
+"""
+Measures the parsing and routing of incoming frames, by replaying a received stream.
+
+The stream is fed in chunks to a handler with devices attached, as a reader thread would,
+once with the devices attached as relays (frames joined back into strings and split again
+by each device) and once as routes (frames split once). A captured stream, e.g. recorded
+with ``cat /dev/ttyACM0 > capture.bin``, can be replayed, given the types of the devices
+it talks to; otherwise BME280 readings are generated.
+
+Usage: python benchmarks/parser_replay.py [--capture capture.bin] [--device B1=BME280 ...]
+                                          [--frames N] [--chunk SIZE] [--repeat N]
+"""
+import argparse
+import random
+import time
+
+from commanduino.commandhandler import CommandHandler
+from commanduino.commanddevices.register import create_and_setup_device
+
+
+class ReplayHandler(CommandHandler):
+    """Only receives, nothing is sent while replaying."""
+    def write(self, msg):
+        pass
+
+
+def generate_stream(command_ids, n_frames):
+    """Temperature, pressure and humidity readings of BME280 sensors."""
+    frames = []
+    for _ in range(n_frames):
+        command_id = random.choice(command_ids)
+        variable = random.choice('TPH')
+        frames.append(f'{command_id},{variable},{random.uniform(0, 1000):.2f};')
+    return ''.join(frames).encode()
+
+
+def make_handler(devices, relays):
+    handler = ReplayHandler()
+    for command_id, bonjour_id in devices.items():
+        device = create_and_setup_device(handler, command_id, bonjour_id, {}, init=False)
+        if relays:
+            handler.remove_route(command_id, device.handle_tokens)
+            handler.add_relay(command_id, device.handle_command)
+    return handler
+
+
+def replay(handler, stream, chunk_size):
+    start = time.perf_counter()
+    for offset in range(0, len(stream), chunk_size):
+        handler.process_bytes(stream[offset:offset + chunk_size])
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--capture', help='file of raw bytes received from a board')
+    parser.add_argument('--device', action='append', default=[], metavar='ID=TYPE',
+                        help='command id and bonjour id of a device of the capture')
+    parser.add_argument('--frames', type=int, default=100000, help='number of frames generated')
+    parser.add_argument('--chunk', type=int, default=64, help='size of the chunks fed to the handler')
+    parser.add_argument('--repeat', type=int, default=5, help='number of replays, the best one is kept')
+    args = parser.parse_args()
+
+    if args.capture:
+        devices = dict(device.split('=', 1) for device in args.device)
+        with open(args.capture, 'rb') as f:
+            stream = f.read()
+    else:
+        devices = {f'B{i}': 'BME280' for i in range(8)}
+        stream = generate_stream(list(devices), args.frames)
+    n_frames = stream.count(b';')
+
+    for name, relays in (('relay', True), ('route', False)):
+        handler = make_handler(devices, relays)
+        best = min(replay(handler, stream, args.chunk) for _ in range(args.repeat))
+        print(f'{name:>8}: {n_frames / best:10.0f} frames/s, {best / n_frames * 1e6:6.2f} us/frame')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Measures the round-trip latency of the get_* requests of a device.
+
+A loopback handler answers every request from a separate thread, standing in for a
+board, so only the cost of the waiting primitive is measured. The historical 1 ms sleep
+polling Lock is compared to the notification based Lock and to the futures now used
+by get_*.
+
+Usage: python benchmarks/request_latency.py [n_requests]
+"""
+import sys
+import time
+import queue
+import threading
+import statistics
+
+from commanduino.lock import Lock
+from commanduino.commandhandler import CommandHandler
+from commanduino.commanddevices.register import create_and_setup_device
+
+
+class PollingLock(Lock):
+    """Reproduces the historical sleep polling wait."""
+    def wait_until_released(self):
+        elapsed = 0
+        start_time = time.time()
+        while self.locked():
+            time.sleep(self.sleep_time)
+            elapsed = time.time() - start_time
+            if elapsed > self.timeout:
+                return False, elapsed
+        return True, elapsed
+
+
+class LoopbackHandler(CommandHandler):
+    """Answers temperature requests from its own thread, like a board would."""
+    def __init__(self):
+        CommandHandler.__init__(self)
+        self.requests = queue.Queue()
+        threading.Thread(target=self.answer, daemon=True).start()
+
+    def write(self, msg):
+        self.requests.put(msg.decode() if isinstance(msg, bytes) else msg)
+
+    def answer(self):
+        while True:
+            command_id = self.requests.get().split(self.delim)[0]
+            self.process_bytes(f'{command_id},T,21.5;'.encode())
+
+
+def get_with_lock(device):
+    """Waits for the answer with the variable lock, as get_* historically did."""
+    device.temperature_lock.acquire()
+    device.request_temperature()
+    device.temperature_lock.wait_until_released()
+    device.temperature_lock.ensure_released()
+
+
+def measure(get, device, n_requests):
+    latencies = []
+    for _ in range(n_requests):
+        start = time.perf_counter()
+        get(device)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def main():
+    n_requests = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    handler = LoopbackHandler()
+    device = create_and_setup_device(handler, 'B1', 'BME280', {})
+    for name, lock_class, get in (('polling', PollingLock, get_with_lock),
+                                  ('condition', Lock, get_with_lock),
+                                  ('future', Lock, lambda device: device.get_temperature())):
+        device.temperature_lock = lock_class()
+        latencies = measure(get, device, n_requests)
+        print(f'{name:>10}: mean {statistics.mean(latencies) * 1e6:8.1f} us '
+              f'median {statistics.median(latencies) * 1e6:8.1f} us '
+              f'max {max(latencies) * 1e6:8.1f} us')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Compares the per-byte serial read path with the bulk read path of SerialCommandHandler.
+
+A fake serial port replays a stream of sensor replies, so no hardware is needed.
+Reports frames per second and CPU time per frame for both paths.
+
+Usage: python benchmarks/serial_read.py [n_frames]
+"""
+import sys
+import time
+
+from commanduino.commandhandler import CommandHandler, SerialCommandHandler
+
+
+class FakeSerial(object):
+    """Serial stand-in serving a fixed stream of bytes."""
+    def __init__(self, data):
+        self.data = data
+        self.pos = 0
+
+    @property
+    def in_waiting(self):
+        return len(self.data) - self.pos
+
+    def read(self, size=1):
+        chunk = self.data[self.pos:self.pos + size]
+        self.pos += len(chunk)
+        return chunk
+
+
+class PerByteHandler(CommandHandler):
+    """Reproduces the historical one byte, one decode, one str append read path."""
+    def __init__(self):
+        CommandHandler.__init__(self)
+        self.str_buffer = ''
+
+    def process_serial(self, a_serial):
+        a_char = a_serial.read(1)
+        if a_char:
+            decoded_char = a_char.decode(encoding="utf-8", errors="ignore")
+            if decoded_char == self.term:
+                self.handle(self.str_buffer)
+                self.str_buffer = ''
+            else:
+                self.str_buffer += decoded_char
+
+
+class BulkHandler(CommandHandler):
+    """Uses the bulk read path of SerialCommandHandler without opening a port."""
+    process_serial = SerialCommandHandler.process_serial
+
+
+def run(handler, data, n_frames):
+    received = []
+    handler.add_command('D1', lambda *args: received.append(args))
+    fake = FakeSerial(data)
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    while fake.in_waiting:
+        handler.process_serial(fake)
+    wall, cpu = time.perf_counter() - wall_start, time.process_time() - cpu_start
+    assert len(received) == n_frames
+    return n_frames / wall, cpu / n_frames
+
+
+def main():
+    n_frames = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    data = b''.join(b'D1,C,%d.%02d;' % (20 + i % 10, i % 100) for i in range(n_frames))
+    for name, handler in (('per-byte', PerByteHandler()), ('bulk', BulkHandler())):
+        fps, cpu = run(handler, data, n_frames)
+        print(f'{name:>10}: {fps:12.0f} frames/s {cpu * 1e6:8.2f} us CPU/frame')
+
+
+if __name__ == '__main__':
+    main()
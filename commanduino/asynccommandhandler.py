@@ -0,0 +1,373 @@
+"""
+
+.. module:: asynccommandhandler
+   :platform: Unix
+   :synopsis: Handles the communication to/from the Arduino Hardware from an asyncio event loop.
+
+"""
+import asyncio
+import functools
+import serial
+import logging
+import threading
+from typing import Callable, Dict, Optional, Union
+
+from .commandhandler import (CommandHandler, DEFAULT_BAUDRATE, DEFAULT_DELIM, DEFAULT_TERM, DEFAULT_CMD_DECIMAL,
+                             DEFAULT_RECV_SIZE, DEFAULT_ENCODING, DEFAULT_MAX_FRAME_SIZE, DEFAULT_OVERFLOW_POLICY,
+                             open_serial_port)
+from .codec import Codec
+from .exceptions import CMHandlerConfigurationError, CMCommunicationError
+
+
+class AsyncCommandHandler(CommandHandler):
+    """
+    Base class of the Command Handlers driven by an asyncio event loop rather than by a thread.
+
+    The link is opened by awaiting open(). Incoming data is parsed by the event loop,
+    so all callbacks are run from the event loop thread. Messages can be written from
+    any thread (e.g. device init() run in an executor), the event loop writes them.
+
+    Args:
+        delim: Delimiter of the command, default set to DEFAULT_DELIM(',')
+
+        term: Terminal character of the command, set to DEFAULT_TERM(';')
+
+        cmd_decimal: Decimal of the command, default set to DEFAULT_CMD_DECIMAL(2)
+
+        codec: The wire format, see make_codec, default set to None (text commands)
+
+        max_frame_size: Longest frame received, terminator excluded, default set to DEFAULT_MAX_FRAME_SIZE (1024)
+
+        overflow: What to do with longer frames, one of OVERFLOW_POLICIES, default set to DEFAULT_OVERFLOW_POLICY
+
+    """
+    def __init__(self, delim: str = DEFAULT_DELIM, term: str = DEFAULT_TERM, cmd_decimal: int = DEFAULT_CMD_DECIMAL,
+                 codec: Union[None, str, Dict, Codec] = None, max_frame_size: int = DEFAULT_MAX_FRAME_SIZE,
+                 overflow: str = DEFAULT_OVERFLOW_POLICY):
+        CommandHandler.__init__(self, delim, term, cmd_decimal, codec, max_frame_size, overflow)
+        self.logger = logging.getLogger(__name__).getChild(self.__class__.__name__)
+        # Loop driving the handler and its thread, set by open()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+
+    async def open(self) -> None:
+        """
+        Opens the communication between the PC and Arduino board.
+        """
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """
+        Closes the communication between the PC and Arduino board.
+        """
+        raise NotImplementedError
+
+    def send(self, command_id: str, *arg) -> None:
+        """
+        Sends a command to the board.
+
+        Args:
+            command_id: The ID of the command.
+
+            *arg: Variable argument.
+
+        """
+        self.write(self.forge_command_bytes(command_id, *arg))
+
+    def write(self, msg: Union[str, bytes]) -> None:
+        """
+        Writes a message to the board. Called from another thread than the one of the event loop,
+        the message is handed to the event loop, the transports not being thread-safe.
+
+        Args:
+            msg: The message to send, bytes are written as is.
+
+        """
+        if isinstance(msg, str):
+            msg = msg.encode(DEFAULT_ENCODING)
+        if self._loop is not None and threading.get_ident() != self._loop_thread:
+            self._check_writable()
+            self._loop.call_soon_threadsafe(self._write, msg)
+        else:
+            self._write(msg)
+
+    def _attach_loop(self) -> asyncio.AbstractEventLoop:
+        """
+        Records the running event loop as the one driving the handler, called by open().
+        """
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        return self._loop
+
+    def _check_writable(self) -> None:
+        """
+        Raises CMCommunicationError if the link is not open.
+        """
+
+    def _process(self, data: bytes) -> None:
+        """
+        Processes the data received, from the event loop thread.
+
+        A callback raising an exception is logged and its frame dropped, the frames received
+        after it are handled.
+
+        Args:
+            data: The data received.
+
+        """
+        process: Optional[Callable[[], None]] = functools.partial(self.process_bytes, data)
+        while process is not None:
+            try:
+                process()
+                process = None
+            except Exception:
+                self.logger.exception('Error handling a frame from %s, dropping it', self.name)
+                process = self.handle_buffer
+
+    def _write(self, msg: bytes) -> None:
+        """
+        Writes a message to the board, from the event loop thread.
+
+        Args:
+            msg: The message to send.
+
+        """
+        raise NotImplementedError
+
+
+class AsyncSerialCommandHandler(AsyncCommandHandler):
+    """
+    Handles commands to/from the Arduino hardware via Serial Communication from an asyncio event loop.
+
+    The port is watched by the event loop (loop.add_reader), no thread is involved.
+
+    Args:
+        port: The port to communicate over.
+
+        baudrate: The baudrate of the serial communication, default set to DEFAULT_BAUDRATE (115200)
+
+        delim: The delimiting character of a command, default set to DEFAULT_DELIM (',')
+
+        term: The terminal character of a command, default set to DEFAULT_TERM (';')
+
+        cmd_decimal: The decimal of the command, default set to DEFAULT_CMD_DECIMAL (2)
+
+        dtr: State of the DTR line on open, False not to reset the board, default set to None (asserted)
+
+        rts: State of the RTS line on open, default set to None (asserted)
+
+        codec: The wire format, see make_codec, default set to None (text commands)
+
+        max_frame_size: Longest frame received, terminator excluded, default set to DEFAULT_MAX_FRAME_SIZE (1024)
+
+        overflow: What to do with longer frames, one of OVERFLOW_POLICIES, default set to DEFAULT_OVERFLOW_POLICY
+
+        **kwargs: Options of the threaded handler that do not apply here (e.g. timeout), ignored.
+
+    """
+    def __init__(self, port: str, baudrate: int = DEFAULT_BAUDRATE, delim: str = DEFAULT_DELIM,
+                 term: str = DEFAULT_TERM, cmd_decimal: int = DEFAULT_CMD_DECIMAL, dtr: Optional[bool] = None,
+                 rts: Optional[bool] = None, codec: Union[None, str, Dict, Codec] = None,
+                 max_frame_size: int = DEFAULT_MAX_FRAME_SIZE, overflow: str = DEFAULT_OVERFLOW_POLICY, **kwargs):
+        AsyncCommandHandler.__init__(self, delim, term, cmd_decimal, codec, max_frame_size, overflow)
+        self.name = port
+        self.port = port
+        self.baudrate = baudrate
+        self.dtr = dtr
+        self.rts = rts
+        self._serial: Optional[serial.Serial] = None
+
+    async def open(self) -> None:
+        """
+        Opens the serial port and starts watching it from the running event loop.
+
+        Raises:
+            CMHandlerConfigurationError: The port cannot be opened or watched.
+
+        """
+        self.logger.debug('Opening port %s', self.port)
+        loop = self._attach_loop()
+        try:
+            self._serial = open_serial_port(self.port, self.baudrate, 0, self.dtr, self.rts)
+            loop.add_reader(self._serial.fileno(), self._on_readable)
+        except (serial.SerialException, TypeError, ValueError, AttributeError, NotImplementedError) as e:
+            self.close()
+            raise CMHandlerConfigurationError(str(e)) from None
+
+    def close(self) -> None:
+        """
+        Stops watching and closes the serial port.
+        """
+        if self._serial is not None:
+            if self._loop is not None and self._serial.is_open:
+                self._loop.remove_reader(self._serial.fileno())
+            self._serial.close()
+            self.logger.debug('Closing port "%s"', self.port)
+
+    def _check_writable(self) -> None:
+        """
+        Raises CMCommunicationError if the serial port is not open.
+        """
+        if self._serial is None or not self._serial.is_open:
+            raise CMCommunicationError(f"Error writing to serial port {self.port}! The port is not open")
+
+    def _write(self, msg: bytes) -> None:
+        """
+        Writes a message over the serial communication.
+
+        Args:
+            msg: The message to send.
+
+        """
+        self.logger.debug('Sending "%s" on port "%s"', msg, self.port)
+        if self._serial is None:
+            raise CMCommunicationError(f"Error writing to serial port {self.port}! The port is not open")
+        try:
+            self._serial.write(msg)
+        except serial.SerialException as e:
+            raise CMCommunicationError(f"Error writing to serial port {self.port}! {e}") from None
+
+    def _on_readable(self) -> None:
+        """
+        Processes the data waiting on the port, called by the event loop.
+        """
+        if self._serial is None:
+            return
+        try:
+            data = self._serial.read(self._serial.in_waiting or 1)
+        except serial.SerialException as e:
+            self.logger.error("Error reading from serial port %s, closing it: %s", self.port, e)
+            self.close()
+        else:
+            self._process(data)
+
+
+class _DatagramProtocol(asyncio.DatagramProtocol):
+    """
+    Feeds the datagrams received by an endpoint to a handler.
+    """
+    def __init__(self, handler: 'AsyncTCPIPCommandHandler'):
+        self.handler = handler
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        self.handler.process_datagram(data)
+
+    def error_received(self, exc: Exception) -> None:
+        self.handler.logger.warning("Error on UDP endpoint %s: %s", self.handler.name, exc)
+
+
+class AsyncTCPIPCommandHandler(AsyncCommandHandler):
+    """
+    Handles commands to/from the Arduino hardware via TCP/IP socket from an asyncio event loop.
+
+    Args:
+        port: The TCP/UDP port to communicate over.
+
+        address: The IP address of the device.
+
+        protocol: Either tcp or udp, default set to TCP.
+
+        delim: The delimiting character of a command, default set to DEFAULT_DELIM (',')
+
+        term: The terminal character of a command, default set to DEFAULT_TERM (';')
+
+        cmd_decimal: The decimal of the command, default set to DEFAULT_CMD_DECIMAL (2)
+
+        codec: The wire format, see make_codec, default set to None (text commands)
+
+        max_frame_size: Longest frame received, terminator excluded, default set to DEFAULT_MAX_FRAME_SIZE (1024)
+
+        overflow: What to do with longer frames, one of OVERFLOW_POLICIES, default set to DEFAULT_OVERFLOW_POLICY
+
+        **kwargs: Options of the threaded handler that do not apply here (e.g. timeout), ignored.
+
+    """
+    def __init__(self, port: str, address: str, protocol: str = "TCP", delim: str = DEFAULT_DELIM,
+                 term: str = DEFAULT_TERM, cmd_decimal: int = DEFAULT_CMD_DECIMAL,
+                 codec: Union[None, str, Dict, Codec] = None, max_frame_size: int = DEFAULT_MAX_FRAME_SIZE,
+                 overflow: str = DEFAULT_OVERFLOW_POLICY, **kwargs):
+        AsyncCommandHandler.__init__(self, delim, term, cmd_decimal, codec, max_frame_size, overflow)
+        self.name = address + ":" + port
+        self.port = port
+        self.address = address
+        self.protocol = protocol.upper()
+        self._transport: Optional[asyncio.WriteTransport] = None  # TCP
+        self._endpoint: Optional[asyncio.DatagramTransport] = None  # UDP
+        self._writer: Optional[asyncio.StreamWriter] = None  # closes the connection when garbage collected
+        self._reader_task: Optional[asyncio.Task] = None
+
+    async def open(self) -> None:
+        """
+        Opens the TCP connection or the UDP endpoint.
+
+        Raises:
+            CMHandlerConfigurationError: Unknown protocol or the socket cannot be opened.
+
+        """
+        self.logger.debug('Opening connection to %s (%s)', self.name, self.protocol)
+        loop = self._attach_loop()
+        try:
+            if self.protocol == "TCP":
+                reader, self._writer = await asyncio.open_connection(self.address, int(self.port))
+                self._transport = self._writer.transport
+                self._reader_task = loop.create_task(self._read(reader))
+            elif self.protocol == "UDP":
+                self._endpoint, _ = await loop.create_datagram_endpoint(
+                    lambda: _DatagramProtocol(self), remote_addr=(self.address, int(self.port)))
+            else:
+                raise CMHandlerConfigurationError(f"Unknown transport layer protocol <{self.protocol}> provided!")
+        except (OSError, TypeError, ValueError) as e:
+            raise CMHandlerConfigurationError(f"Can't open socket! {e}") from None
+
+    async def _read(self, reader: asyncio.StreamReader) -> None:
+        """
+        Processes the data received on the TCP connection until it is closed.
+        """
+        try:
+            while True:
+                data = await reader.read(DEFAULT_RECV_SIZE)
+                if not data:
+                    self.logger.warning("Connection closed by %s", self.name)
+                    break
+                self._process(data)
+        except OSError as e:
+            self.logger.error("Error reading from socket %s: %s", self.name, e)
+        self.close()
+
+    def close(self) -> None:
+        """
+        Closes the connection.
+        """
+        transport = self._transport or self._endpoint
+        if transport is not None:
+            transport.close()
+            self.logger.debug("Connection closed.")
+        if self._reader_task is not None and self._reader_task is not asyncio.current_task():
+            self._reader_task.cancel()
+
+    def _check_writable(self) -> None:
+        """
+        Raises CMCommunicationError if the socket is not connected.
+        """
+        transport = self._transport or self._endpoint
+        if transport is None or transport.is_closing():
+            raise CMCommunicationError(f"Error writing to socket! {self.name} is not connected")
+
+    def _write(self, msg: bytes) -> None:
+        """
+        Writes raw data into the socket.
+
+        Args:
+            msg: The message to send.
+
+        """
+        self.logger.debug('Sending "%s" to "%s"', msg, self.name)
+        self._check_writable()
+        if self._endpoint is not None:
+            self._endpoint.sendto(msg)
+        elif self._transport is not None:
+            self._transport.write(msg)
+
+
+# Typing variable for either Serial or TCPIP AsyncCommandHandler
+GenericAsyncCommandHandler = Union[AsyncSerialCommandHandler, AsyncTCPIPCommandHandler]
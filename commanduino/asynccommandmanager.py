@@ -0,0 +1,325 @@
+"""
+.. module:: asynccommandmanager
+   :platform: Unix
+   :synopsis: Module to manage various Command Handlers from an asyncio event loop.
+
+"""
+from .asynccommandhandler import AsyncSerialCommandHandler
+from .asynccommandhandler import AsyncTCPIPCommandHandler
+from .asynccommandhandler import GenericAsyncCommandHandler
+
+from .commanddevices.register import create_and_setup_device
+from .commanddevices.register import DEFAULT_REGISTER
+
+from .commandmanager import (VirtualDevice,
+                             DEFAULT_INIT_TIMEOUT,
+                             DEFAULT_INIT_N_REPEATS,
+                             COMMAND_BONJOUR,
+                             COMMAND_IS_INIT,
+                             COMMAND_INIT)
+
+from .exceptions import (CMManagerConfigurationError,
+                         CMHandlerConfigurationError,
+                         CMHandlerDiscoveryTimeout,
+                         CMDeviceConfigurationError,
+                         CMDeviceDiscoveryTimeout,
+                         CMDeviceRegisterError,
+                         CMCommunicationError)
+
+import time
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+# Time to wait for the bonjour replies of all handlers at once
+DEFAULT_DISCOVERY_TIMEOUT = 1
+
+
+class AsyncCommandManager(object):
+    """
+    Manages varying amounts of asyncio Command Handler objects.
+
+    Build it with ``await AsyncCommandManager.from_config(config)``: the handlers are opened and
+    initialised concurrently, then all devices are discovered concurrently.
+    Device values can then be awaited with the ``get_<variable>_async()`` coroutines of the devices.
+
+    Args:
+        init_timeout: Initialisation timeout, default set to DEFAULT_INIT_TIMEOUT (1).
+
+        init_n_repeats: Number of times to attempt initialisation, default set to DEFAULT_INIT_N_REPEATS (5).
+
+        discovery_timeout: Time to wait for a device to answer bonjour, default set to DEFAULT_DISCOVERY_TIMEOUT (1).
+
+        simulation: Replaces devices with virtual ones, default set to False.
+    """
+    def __init__(self, init_timeout: float = DEFAULT_INIT_TIMEOUT, init_n_repeats: int = DEFAULT_INIT_N_REPEATS,
+                 discovery_timeout: float = DEFAULT_DISCOVERY_TIMEOUT, simulation: bool = False):
+        self.logger = logging.getLogger(__name__).getChild(self.__class__.__name__)
+
+        self._simulation = simulation
+
+        self.initialised = False
+        self.init_timeout = init_timeout
+        self.init_n_repeats = init_n_repeats
+        self.discovery_timeout = discovery_timeout
+
+        self.commandhandlers: List[GenericAsyncCommandHandler] = []
+        self.devices: Dict[str, Any] = {}
+
+    @classmethod
+    async def from_config(cls, config: Dict) -> 'AsyncCommandManager':
+        """
+        Creates the manager, then opens its handlers and registers its devices from a configuration.
+
+        Args:
+            cls (AsyncCommandManager): The instantiating class.
+
+            config (Dict): Dictionary containing the configuration data.
+
+        """
+        try:
+            command_configs = config["ios"]
+            devices = config["devices"]
+        except KeyError as e:
+            raise CMManagerConfigurationError(f"Invalid configuration provided: missing {e} in dict!") from None
+        manager = cls(simulation=config.get("simulation", False))
+        await manager.start(command_configs, devices)
+        return manager
+
+    async def start(self, command_configs: List[Dict], devices_dict: Dict) -> None:
+        """
+        Opens and initialises all handlers concurrently, then registers all devices.
+
+        Args:
+            command_configs: Collection of command configurations.
+
+            devices_dict: Dictionary containing the list of devices.
+
+        """
+        if self._simulation:
+            self.logger.info("Simulation mode, skipping handlers creation.")
+            self.commandhandlers = command_configs  # type: ignore
+        else:
+            handlers = await asyncio.gather(*[self.add_command_handler(config) for config in command_configs])
+            self.commandhandlers = [handler for handler in handlers if handler is not None]
+        await self.register_all_devices(devices_dict)
+        self.set_devices_as_attributes()
+        self.initialised = True
+
+    async def add_command_handler(self, handler_config: Dict) -> Optional[GenericAsyncCommandHandler]:
+        """
+        Creates and opens a command handler from the configuration dictionary and waits for the board to init.
+
+        Args:
+            handler_config: Handler configuration dictionary.
+
+        Returns:
+            The initialised handler, None if it could not be opened or did not initialise.
+
+        """
+        handler_config = handler_config.copy()
+        handler_type = handler_config.pop("type", "serial")
+        device_name = handler_config.get("address", "") + ":" + handler_config.get("port", "")
+        required = handler_config.pop("required", False)
+
+        try:
+            if handler_type == "serial":
+                handler = AsyncSerialCommandHandler.from_config(handler_config)
+            elif handler_type == "tcpip":
+                handler = AsyncTCPIPCommandHandler.from_config(handler_config)
+            else:
+                raise CMHandlerConfigurationError(f"Unknown command handler type <{handler_type}>!")
+            assert isinstance(handler, (AsyncSerialCommandHandler, AsyncTCPIPCommandHandler))
+            await handler.open()
+        except (CMHandlerConfigurationError, TypeError) as e:
+            if required:
+                raise CMHandlerConfigurationError(f"Error initializing device {device_name}: {e}") from None
+            self.logger.warning(f"I/O device {device_name} (type {handler_type}) was not found")
+            self.logger.warning("Additional error message: %s", e)
+            return None
+
+        handler.add_default_handler(self.unrecognized)
+        try:
+            elapsed = await self.wait_device_for_init(handler)
+            self.logger.info(f"Found Arduino CommandManager at {device_name}, init time was {elapsed:.3} seconds")
+        except CMHandlerDiscoveryTimeout:
+            self.logger.warning(f"Arduino CommandManager at {device_name} has not initialized")
+            handler.close()
+            return None
+        return handler
+
+    async def wait_device_for_init(self, handler: GenericAsyncCommandHandler) -> float:
+        """
+        Requests initialisation until the board replies or the attempts are exhausted.
+
+        Args:
+            handler: Command Handler object for communication.
+
+        Returns:
+            elapsed: Time waited for initialisation.
+
+        Raises:
+            CMHandlerDiscoveryTimeout: CommandManager on the port was not initialised.
+
+        """
+        self.logger.debug('Waiting for device at %s to init...', handler.name)
+        start_time = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+
+        def handle_init(*arg):
+            if arg[0] and bool(int(arg[0])) and not future.done():
+                future.set_result(True)
+
+        handler.add_command(COMMAND_INIT, handle_init)
+        try:
+            for _ in range(self.init_n_repeats):
+                handler.send(COMMAND_IS_INIT)
+                try:
+                    await asyncio.wait_for(asyncio.shield(future), self.init_timeout)
+                    return time.monotonic() - start_time
+                except asyncio.TimeoutError:
+                    continue
+        except CMCommunicationError:
+            pass
+        finally:
+            handler.remove_command(COMMAND_INIT, handle_init)
+        raise CMHandlerDiscoveryTimeout(handler.name)
+
+    async def register_all_devices(self, devices_dict: Dict) -> None:
+        """
+        Discovers and registers all devices concurrently.
+
+        Args:
+            devices_dict: Dictionary containing all devices.
+
+        """
+        results = await asyncio.gather(*[self.register_device(device_name, device_info)
+                                         for device_name, device_info in devices_dict.items()],
+                                       return_exceptions=True)
+        for result in results:
+            if isinstance(result, CMDeviceConfigurationError):
+                self.logger.error(result)
+            elif isinstance(result, BaseException):
+                raise result
+
+    async def detect_device(self, command_id: str) -> Tuple[GenericAsyncCommandHandler, str, float]:
+        """
+        Sends bonjour to all handlers at once and waits for the first reply.
+
+        Args:
+            command_id: The ID of the command.
+
+        Returns:
+            handler: The Command Handler the device is connected to.
+
+            bonjour_id: The Bonjour ID.
+
+            elapsed: Time elapsed since request.
+
+        Raises:
+            CMDeviceDiscoveryTimeout: No handler replied in time.
+
+        """
+        start_time = time.monotonic()
+        found = asyncio.get_running_loop().create_future()
+        relays = []
+
+        for handler in self.commandhandlers:
+            def handle_bonjour(cmd, handler=handler):
+                # Relays receive the command without its id, e.g. "BONJOUR,SERVO;"
+                cmd_list = cmd.strip().strip(handler.term).split(handler.delim)
+                if cmd_list[0] == COMMAND_BONJOUR and len(cmd_list) > 1 and cmd_list[1] and not found.done():
+                    found.set_result((handler, cmd_list[1]))
+
+            handler.add_relay(command_id, handle_bonjour)
+            relays.append((handler, handle_bonjour))
+        try:
+            for handler, _ in relays:
+                self.logger.debug('Scanning for "%s" at "%s"...', command_id, handler.name)
+                try:
+                    handler.send(command_id, COMMAND_BONJOUR)
+                except CMCommunicationError as e:
+                    self.logger.warning("Cannot scan %s: %s", handler.name, e)
+            handler, bonjour_id = await asyncio.wait_for(found, self.discovery_timeout)
+        except asyncio.TimeoutError:
+            raise CMDeviceDiscoveryTimeout(f"Device with ID <{command_id}> has not been found!") from None
+        finally:
+            for relay_handler, relay in relays:
+                relay_handler.remove_relay(command_id, relay)
+        return handler, bonjour_id, time.monotonic() - start_time
+
+    async def register_device(self, device_name: str, device_info: Dict) -> None:
+        """
+        Discovers, creates and initialises an individual Arduino device.
+
+        The device init() is run in the default executor, as it may block waiting for replies
+        which are processed by the event loop.
+
+        Args:
+            device_name: Name of the device.
+
+            device_info: Dictionary containing the device information.
+
+        Raises:
+            CMDeviceConfigurationError: Invalid device configuration.
+
+            CMDeviceDiscoveryTimeout: Device has not been found.
+
+        """
+        command_id = device_info.get('command_id', "")
+        if command_id == "":
+            raise CMDeviceConfigurationError(f"Invalid or missing 'command_id' in {device_name} configuration!")
+
+        device_config = device_info.get("config", {})
+
+        if self._simulation:
+            self.devices[device_name] = VirtualDevice(device_name, device_config)
+            return
+
+        try:
+            handler, bonjour_id, elapsed = await self.detect_device(command_id)
+        except CMDeviceDiscoveryTimeout:
+            raise CMDeviceDiscoveryTimeout(f"Device '{device_name}' (ID=<{command_id}>) has not been found!") from None
+        self.logger.debug(f"Device '{device_name}' (ID=<{command_id}> type=<{bonjour_id}>) found on {handler.name} "
+                          f"in {elapsed:.3f} s")
+
+        try:
+            device = create_and_setup_device(handler, command_id, bonjour_id, device_config, init=False)
+        except CMDeviceRegisterError:
+            device = create_and_setup_device(handler, command_id, DEFAULT_REGISTER, device_config, init=False)
+            self.logger.warning(f"Device '{device_name}' NOT found in the register! Initialized as blank minimal object"
+                                f"! (ID=<{command_id}> type=<{bonjour_id}> handler=<{handler.name}>)")
+        await asyncio.get_running_loop().run_in_executor(None, device.init)
+        self.devices[device_name] = device
+
+    def set_devices_as_attributes(self) -> None:
+        """
+        Sets the list of devices as attributes.
+        """
+        for device_name, device in list(self.devices.items()):
+            if hasattr(self, device_name):
+                self.logger.warning(f"Device named {device_name} is already a reserved attribute! "
+                                    f"Please change name or do not use this device in attribute mode, "
+                                    f"rather use devices[{device_name}]")
+            else:
+                setattr(self, device_name, device)
+
+    def close(self) -> None:
+        """
+        Closes all handlers.
+        """
+        if self._simulation:
+            return
+        for handler in self.commandhandlers:
+            handler.close()
+
+    def unrecognized(self, cmd: str) -> None:
+        """
+        Received command is unrecognised.
+
+        Args:
+            cmd (str): The received command.
+
+        """
+        if self.initialised:
+            self.logger.warning('Received unknown command "{}"'.format(cmd))
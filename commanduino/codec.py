@@ -0,0 +1,286 @@
+"""
+
+.. module:: codec
+   :platform: Unix
+   :synopsis: Wire formats of the commands exchanged with the Arduino hardware.
+
+"""
+import binascii
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from .exceptions import CMHandlerConfigurationError
+
+
+class Codec(object):
+    """
+    Base class of the wire formats.
+
+    Frames are separated by the terminator of the codec. A frame is decoded into a list
+    of tokens, the command id followed by its arguments as strings, so that callbacks
+    get the same arguments whatever the codec.
+    """
+    name = ''
+    terminator = b''
+
+    def decode(self, frame: Union[bytes, bytearray, memoryview]) -> Optional[List[str]]:
+        """
+        Decodes a frame, without its terminator.
+
+        Args:
+            frame: The frame, any bytes-like object.
+
+        Returns:
+            The command id followed by the arguments, None if the frame is invalid.
+
+        """
+        raise NotImplementedError
+
+    def encode(self, fields: Sequence[Any], cmd_decimal: int) -> bytes:
+        """
+        Encodes a command into a frame, terminator included.
+
+        Args:
+            fields: The command id (with its header, if any) followed by the arguments.
+
+            cmd_decimal: The number of decimals of the floats, those of the handler sending the command.
+
+        Returns:
+            The frame.
+
+        """
+        raise NotImplementedError
+
+
+class TextCodec(Codec):
+    """
+    Text commands, e.g. "S1,M,1.50;": fields separated by a delimiter and commands ended by a terminator.
+
+    Args:
+        delim: The delimiting character of a command.
+
+        term: The terminal character of a command.
+
+        encoding: The encoding of the text.
+
+    """
+    name = 'text'
+
+    def __init__(self, delim: str, term: str, encoding: str = 'utf-8'):
+        self.delim = delim
+        self.term = term
+        self.encoding = encoding
+        self.terminator = term.encode(encoding)
+
+    def decode(self, frame: Union[bytes, bytearray, memoryview]) -> Optional[List[str]]:
+        return str(frame, self.encoding, "ignore").strip().strip(self.term).split(self.delim)
+
+    def encode(self, fields: Sequence[Any], cmd_decimal: int) -> bytes:
+        return (self.delim.join('%.*f' % (cmd_decimal, field) if type(field) is float else str(field)
+                                for field in fields) + self.term).encode(self.encoding)
+
+
+# Field tags of the binary codec
+TAG_STRING = 0x73  # 's', varint length then UTF-8 bytes
+TAG_INT = 0x69  # 'i', zigzag varint
+TAG_FIXED = 0x66  # 'f', number of decimals then zigzag varint of the value scaled by 10 ** decimals
+
+
+class BinaryCodec(Codec):
+    """
+    Compact binary commands, COBS framed so that frames are ended by a zero byte.
+
+    A frame holds tagged fields, see TAG_STRING, TAG_INT and TAG_FIXED, optionally followed
+    by their CRC-16/CCITT-FALSE, big endian. Numbers are sent as varints: ints as is and
+    floats in fixed point, with the cmd_decimal decimals of the handler. The board has to speak
+    the same codec.
+
+    Args:
+        crc: Appends a CRC to the frames sent and checks the one of the frames received, default set to True.
+
+    """
+    name = 'binary'
+    terminator = b'\x00'
+
+    def __init__(self, crc: bool = True):
+        self.crc = crc
+
+    def decode(self, frame: Union[bytes, bytearray, memoryview]) -> Optional[List[str]]:
+        try:
+            data = cobs_decode(frame)
+            if self.crc:
+                if len(data) < 2 or binascii.crc_hqx(data[:-2], 0xFFFF) != int.from_bytes(data[-2:], 'big'):
+                    return None
+                data = data[:-2]
+            tokens = []
+            i = 0
+            while i < len(data):
+                tag = data[i]
+                if tag == TAG_STRING:
+                    length, i = decode_varint(data, i + 1)
+                    if i + length > len(data):
+                        return None
+                    tokens.append(data[i:i + length].decode('utf-8', errors="ignore"))
+                    i += length
+                elif tag == TAG_INT:
+                    value, i = decode_varint(data, i + 1)
+                    tokens.append(str(unzigzag(value)))
+                elif tag == TAG_FIXED:
+                    decimals = data[i + 1]
+                    value, i = decode_varint(data, i + 2)
+                    tokens.append('%.*f' % (decimals, unzigzag(value) / 10 ** decimals))
+                else:
+                    return None
+        except (ValueError, IndexError):
+            return None
+        return tokens if tokens else None
+
+    def encode(self, fields: Sequence[Any], cmd_decimal: int) -> bytes:
+        data = bytearray()
+        for field in fields:
+            field_type = type(field)
+            if field_type is int:
+                data.append(TAG_INT)
+                data += encode_varint(zigzag(field))
+            elif field_type is float:
+                data.append(TAG_FIXED)
+                data.append(cmd_decimal)
+                data += encode_varint(zigzag(round(field * 10 ** cmd_decimal)))
+            else:
+                text = str(field).encode('utf-8')
+                data.append(TAG_STRING)
+                data += encode_varint(len(text))
+                data += text
+        if self.crc:
+            data += binascii.crc_hqx(data, 0xFFFF).to_bytes(2, 'big')
+        return cobs_encode(data) + self.terminator
+
+
+def zigzag(value: int) -> int:
+    """
+    Maps signed ints to unsigned ones, small magnitudes to small values: 0, -1, 1, -2... to 0, 1, 2, 3...
+    """
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def unzigzag(value: int) -> int:
+    """
+    Reverts zigzag().
+    """
+    return value >> 1 if not value & 1 else -((value + 1) >> 1)
+
+
+def encode_varint(value: int) -> bytes:
+    """
+    Encodes an unsigned int 7 bits per byte, least significant first, the high bit set on all bytes but the last.
+    """
+    data = bytearray()
+    while value > 0x7F:
+        data.append(0x80 | (value & 0x7F))
+        value >>= 7
+    data.append(value)
+    return bytes(data)
+
+
+def decode_varint(data: Union[bytes, bytearray, memoryview], i: int) -> Tuple[int, int]:
+    """
+    Decodes an unsigned varint.
+
+    Args:
+        data: The data holding the varint.
+
+        i: Index of the varint in the data.
+
+    Returns:
+        value: The value.
+
+        i: Index following the varint.
+
+    Raises:
+        IndexError: The varint is truncated.
+
+    """
+    value = 0
+    shift = 0
+    while True:
+        byte = data[i]
+        i += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, i
+        shift += 7
+
+
+def cobs_encode(data: Union[bytes, bytearray, memoryview]) -> bytes:
+    """
+    Encodes data with Consistent Overhead Byte Stuffing, so that the result holds no zero byte.
+    """
+    encoded = bytearray()
+    for block in bytes(data).split(b'\x00'):
+        while len(block) >= 0xFE:
+            encoded.append(0xFF)
+            encoded += block[:0xFE]
+            block = block[0xFE:]
+        encoded.append(len(block) + 1)
+        encoded += block
+    return bytes(encoded)
+
+
+def cobs_decode(data: Union[bytes, bytearray, memoryview]) -> bytes:
+    """
+    Decodes data encoded by cobs_encode.
+
+    Raises:
+        ValueError: The data is not valid COBS.
+
+    """
+    decoded = bytearray()
+    i = 0
+    n = len(data)
+    while i < n:
+        code = data[i]
+        if code == 0 or i + code > n:
+            raise ValueError("Invalid COBS data")
+        decoded += data[i + 1:i + code]
+        i += code
+        if code < 0xFF and i < n:
+            decoded.append(0)
+    return bytes(decoded)
+
+
+# Codec classes per name, as given in the "codec" entry of a handler configuration
+CODECS = {TextCodec.name: TextCodec, BinaryCodec.name: BinaryCodec}
+
+
+def make_codec(spec: Union[None, str, Dict, Codec], delim: str, term: str) -> Codec:
+    """
+    Creates the codec of a handler from its configuration.
+
+    Args:
+        spec: None or "text" for the text commands, "binary" for the binary ones, a dictionary with
+            the "type" of codec and its options (e.g. {"type": "binary", "crc": false}), or a codec.
+
+        delim: The delimiting character of the text commands.
+
+        term: The terminal character of the text commands.
+
+    Raises:
+        CMHandlerConfigurationError: Unknown codec or invalid options.
+
+    """
+    if isinstance(spec, Codec):
+        return spec
+    options: Dict[str, Any] = {}
+    if spec is None:
+        spec = TextCodec.name
+    elif isinstance(spec, dict):
+        options = dict(spec)
+        spec = options.pop("type", TextCodec.name)
+    if spec == TextCodec.name:
+        options.setdefault("delim", delim)
+        options.setdefault("term", term)
+    if spec not in CODECS:
+        raise CMHandlerConfigurationError(f"Unknown codec <{spec}>!")
+    try:
+        return CODECS[spec](**options)
+    except TypeError as e:
+        raise CMHandlerConfigurationError(f"Invalid options for codec <{spec}>: {e}") from None
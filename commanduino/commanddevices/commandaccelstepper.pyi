@@ -1,3 +1,5 @@
+from concurrent.futures import Future
+from typing import Optional
 from . import CommandDevice
 
 class CommandAccelStepper(CommandDevice):
@@ -9,15 +11,21 @@ class CommandAccelStepper(CommandDevice):
     def stop(self, wait: bool = True) -> None: ...
 
     # Acceleration
-    def get_acceleration(self) -> float: ...
+    def get_acceleration(self, max_age: Optional[float] = None) -> float: ...
+    async def get_acceleration_async(self, max_age: Optional[float] = None) -> float: ...
+    def request_acceleration_async(self) -> Future[float]: ...
     def set_acceleration(self, steps_per_second_per_second: float) -> None: ...
 
     # Current position
-    def get_current_position(self) -> float: ...
+    def get_current_position(self, max_age: Optional[float] = None) -> float: ...
+    async def get_current_position_async(self, max_age: Optional[float] = None) -> float: ...
+    def request_current_position_async(self) -> Future[float]: ...
     def set_current_position(self, steps: float) -> None: ...
 
     # Distance to go
-    def get_distance_to_go(self) -> float: ...
+    def get_distance_to_go(self, max_age: Optional[float] = None) -> float: ...
+    async def get_distance_to_go_async(self, max_age: Optional[float] = None) -> float: ...
+    def request_distance_to_go_async(self) -> Future[float]: ...
 
     # Enabled acceleration
     enabled_acceleration: bool
@@ -27,20 +35,28 @@ class CommandAccelStepper(CommandDevice):
     # Moving state
     @property
     def is_moving(self) -> bool: ...
-    def get_moving_state(self) -> bool: ...
+    def get_moving_state(self, max_age: Optional[float] = None) -> bool: ...
+    async def get_moving_state_async(self, max_age: Optional[float] = None) -> bool: ...
+    def request_moving_state_async(self) -> Future[bool]: ...
 
     # Max speed
-    def get_max_speed(self) -> float: ...
+    def get_max_speed(self, max_age: Optional[float] = None) -> float: ...
+    async def get_max_speed_async(self, max_age: Optional[float] = None) -> float: ...
+    def request_max_speed_async(self) -> Future[float]: ...
     def set_max_speed(self, steps_per_second: float) -> None: ...
 
     # Speed
     # _set_speed() sets the speed in the Arduino before actually moving the motor [e.g. in move(), move_to()]
     # set_running_speed sets the value of the running_speed variable, used for set_speed before normal movements
-    def get_speed(self) -> float: ...
+    def get_speed(self, max_age: Optional[float] = None) -> float: ...
+    async def get_speed_async(self, max_age: Optional[float] = None) -> float: ...
+    def request_speed_async(self) -> Future[float]: ...
     def _set_speed(self, steps_per_second: float) -> None: ...
 
     # Running speed
     def set_running_speed(self, steps_per_second: int) -> None: ...
 
     # Target position
-    def get_target_position(self) -> float: ...
+    def get_target_position(self, max_age: Optional[float] = None) -> float: ...
+    async def get_target_position_async(self, max_age: Optional[float] = None) -> float: ...
+    def request_target_position_async(self) -> Future[float]: ...
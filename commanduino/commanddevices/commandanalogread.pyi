@@ -1,6 +1,10 @@
+from concurrent.futures import Future
+from typing import Optional
 from .commanddevice import CommandDevice
 
 class CommandAnalogRead(CommandDevice):
     def __init__(self): ...
-    def get_level(self) -> int: ...
+    def get_level(self, max_age: Optional[float] = None) -> int: ...
+    async def get_level_async(self, max_age: Optional[float] = None) -> int: ...
+    def request_level_async(self) -> Future[int]: ...
     def handle_level_command(self, *arg): ...
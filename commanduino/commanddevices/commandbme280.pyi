@@ -1,3 +1,5 @@
+from concurrent.futures import Future
+from typing import Optional
 from . import CommandDevice
 from ..lock import Lock
 
@@ -6,6 +8,12 @@ class CommandBME280(CommandDevice):
     pressure_lock: Lock
     temperature_lock: Lock
     humidity_lock: Lock
-    def get_pressure(self) -> float: ...
-    def get_temperature(self) -> float: ...
-    def get_humidity(self) -> float: ...
+    def get_pressure(self, max_age: Optional[float] = None) -> float: ...
+    async def get_pressure_async(self, max_age: Optional[float] = None) -> float: ...
+    def request_pressure_async(self) -> Future[float]: ...
+    def get_temperature(self, max_age: Optional[float] = None) -> float: ...
+    async def get_temperature_async(self, max_age: Optional[float] = None) -> float: ...
+    def request_temperature_async(self) -> Future[float]: ...
+    def get_humidity(self, max_age: Optional[float] = None) -> float: ...
+    async def get_humidity_async(self, max_age: Optional[float] = None) -> float: ...
+    def request_humidity_async(self) -> Future[float]: ...
@@ -9,9 +9,14 @@
 """
 from ..commandhandler import CommandHandler
 from ..lock import Lock
-from ..exceptions import CMDeviceReplyTimeout
+from ..exceptions import CMDeviceReplyTimeout, CMDeviceConfigurationError
 
+import time
+import asyncio
 import logging
+import threading
+from collections import deque
+from concurrent.futures import Future, TimeoutError
 
 # Default timeout value
 DEFAULT_TIMEOUT = 1
@@ -31,6 +36,17 @@ class CommandDevice(object):
         self.cmdHdl = CommandHandler()
         self.cmdHdl.add_default_handler(self.unrecognized)
 
+        # Requests in flight per variable name, as (future, deadline) oldest first
+        self.pending_requests = {}
+        # Held to complete a request future, answers and timeouts may race to complete the same one
+        self._completion_lock = threading.Lock()
+        # (request_command, answer_command, timeout) per variable name
+        self.registered_requests = {}
+
+        # Time of the last answer per variable name, and how long get_<variable> may reuse it
+        self.last_update = {}
+        self.cache_policy = None
+
     def init(self):
         """
         .. note:: This function is called once the write function is set. Device setup (sending commands) goes here
@@ -58,6 +74,16 @@ class CommandDevice(object):
         """
         self.cmdHdl.handle(cmd)
 
+    def handle_tokens(self, cmd_list):
+        """
+        Handles a command to the device already split by the handler of the board, see CommandHandler.add_route.
+
+        Args:
+            cmd_list (List[str]): The command id followed by the arguments.
+
+        """
+        self.cmdHdl.handle_tokens(cmd_list)
+
     def set_command_header(self, cmdHeader):
         """
         Sets the command header.
@@ -68,6 +94,16 @@ class CommandDevice(object):
         """
         self.cmdHdl.set_command_header(cmdHeader)
 
+    def set_codec(self, codec):
+        """
+        Sets the wire format of the commands sent, the one of the handler of the board.
+
+        Args:
+            codec (Codec): The codec to be set.
+
+        """
+        self.cmdHdl.set_codec(codec)
+
     def set_write_function(self, write_func):
         """
         Sets the write function for the device.
@@ -88,7 +124,7 @@ class CommandDevice(object):
             *arg: Variable argument.
 
         """
-        self.write(self.cmdHdl.forge_command(command_id, *arg))
+        self.write(self.cmdHdl.forge_command_bytes(command_id, *arg))
 
     def unrecognized(self, cmd):
         """
@@ -100,6 +136,84 @@ class CommandDevice(object):
         """
         self.logger.warning('Received unknown command "{}"'.format(cmd))
 
+    def set_cache_policy(self, max_age):
+        """
+        Sets how long the get_<variable> functions return the last received value without a new request.
+
+        Args:
+            max_age (float or Dict): Maximum age in seconds, for all variables or per variable name.
+                None (the default) always sends a request.
+
+        """
+        self.cache_policy = max_age
+
+    def get_cache_max_age(self, variable_name):
+        """
+        Gets the maximum age of a cached value according to the cache policy.
+
+        Args:
+            variable_name (str): The name of the variable.
+
+        Returns:
+            The maximum age in seconds, None when the variable is not cached.
+
+        """
+        if isinstance(self.cache_policy, dict):
+            return self.cache_policy.get(variable_name)
+        return self.cache_policy
+
+    def is_fresh(self, variable_name, max_age):
+        """
+        Checks whether the last received value of a variable is recent enough to be reused.
+
+        Args:
+            variable_name (str): The name of the variable.
+
+            max_age (float): Maximum age in seconds, None is never fresh.
+
+        """
+        if max_age is None or variable_name not in self.last_update:
+            return False
+        return time.monotonic() - self.last_update[variable_name] <= max_age
+
+    def prepare_request(self, variable_name):
+        """
+        Queues a request for a variable and forges its command, without sending it.
+        Used to send several requests in a single write.
+
+        Args:
+            variable_name (str): The name of the variable, as given to register_request.
+
+        Returns:
+            future (Future): Resolved with the updated value of the variable, see request_<variable>_async.
+
+            command (bytes): The request command to write. If it cannot be written, cancel the future.
+
+        Raises:
+            CMDeviceConfigurationError: No request is registered for this variable.
+
+        """
+        try:
+            request_command, answer_command, timeout = self.registered_requests[variable_name]
+        except KeyError:
+            raise CMDeviceConfigurationError(f"No request registered for '{variable_name}'!") from None
+        future = Future()
+        pending = self.pending_requests[variable_name]
+        now = time.monotonic()
+        with self._completion_lock:
+            # Drops the requests done or expired while unanswered, so that the queue does not grow
+            for _ in range(len(pending)):
+                entry = pending.popleft()
+                if entry[0].done():
+                    continue
+                if entry[1] < now:
+                    entry[0].set_exception(CMDeviceReplyTimeout(self.cmdHdl.cmd_header, request_command,
+                                                                float(timeout)))
+                    continue
+                pending.append(entry)
+            pending.append((future, now + timeout))
+        return future, self.cmdHdl.forge_command_bytes(request_command)
+
     def register_request(self, request_command, answer_command, variable_name, callback_function_for_variable_update, variable_init_value=None, timeout=DEFAULT_TIMEOUT):
         """
         Registers a new request to/from the device.
@@ -121,10 +235,48 @@ class CommandDevice(object):
 
         setattr(self, variable_name, variable_init_value)
 
+        # Released by the answer callbacks of the devices, get_<variable> itself waits on futures
         lock_variable_name = variable_name + '_lock'
         setattr(self, lock_variable_name, Lock(timeout))
 
-        self.cmdHdl.add_command(answer_command, callback_function_for_variable_update)
+        self.registered_requests[variable_name] = (request_command, answer_command, timeout)
+        # Keyed by variable, variables sharing an answer command (e.g. MAX31865) each resolve their own requests
+        pending = self.pending_requests.setdefault(variable_name, deque())
+
+        def update_variable(*arg):
+            # The device callbacks release the variable lock when they accept an answer, so the lock tells
+            # whether the variable was updated. It is held meanwhile, unless a caller already holds it.
+            lock = getattr(self, lock_variable_name)
+            acquired = lock.acquire(blocking=False)
+            try:
+                callback_function_for_variable_update(*arg)
+            finally:
+                accepted = not lock.locked()
+                if acquired and not accepted:
+                    lock.release()
+            if accepted:
+                resolve_pending_request()
+
+        def resolve_pending_request():
+            # Each accepted answer resolves the oldest request still waiting, expired ones are failed on the way
+            now = time.monotonic()
+            self.last_update[variable_name] = now
+            with self._completion_lock:
+                while pending:
+                    future, deadline = pending.popleft()
+                    if future.done():
+                        continue
+                    if deadline < now:
+                        future.set_exception(reply_timeout())
+                        continue
+                    if future.set_running_or_notify_cancel():
+                        future.set_result(getattr(self, variable_name))
+                    break
+
+        def reply_timeout():
+            return CMDeviceReplyTimeout(self.cmdHdl.cmd_header, request_command, float(timeout))
+
+        self.cmdHdl.add_command(answer_command, update_variable)
 
         request_function_name = 'request_' + variable_name
 
@@ -136,27 +288,110 @@ class CommandDevice(object):
 
         setattr(self, request_function_name, request)
 
+        def request_async():
+            """
+            Sends the request command without waiting for the answer.
+            Several requests can be in flight, answers are matched to them in order.
+
+            Returns:
+                Future: Resolved with the updated value of the variable. It fails with CMDeviceReplyTimeout
+                when a later answer finds it expired, use result(timeout) to bound the wait.
+            """
+            future, command = self.prepare_request(variable_name)
+            try:
+                self.write(command)
+            except Exception:
+                future.cancel()
+                raise
+            return future
+
+        setattr(self, request_function_name + '_async', request_async)
+
+        # Request currently in flight for get_<variable>, shared by all concurrent callers, as (future, deadline)
+        in_flight = [None]
+        in_flight_lock = threading.Lock()
+
+        def shared_request():
+            with in_flight_lock:
+                request = in_flight[0]
+                # An unanswered request is not joined past its deadline, its answer may have been lost
+                if request is None or request[0].done() or request[1] < time.monotonic():
+                    request = in_flight[0] = (request_async(), time.monotonic() + timeout)
+            return request[0]
+
+        def expire_shared_request(future):
+            # Fails the request for all its callers, so that the next get_<variable> sends a new one
+            error = reply_timeout()
+            with self._completion_lock:
+                if not future.done():
+                    future.set_exception(error)
+                for entry in pending:
+                    if entry[0] is future:
+                        pending.remove(entry)
+                        break
+            with in_flight_lock:
+                if in_flight[0] is not None and in_flight[0][0] is future:
+                    in_flight[0] = None
+            return error
+
         get_function_name = 'get_' + variable_name
 
-        def get():
+        def get(max_age=None):
             """
             Gets the variable name.
 
+            Args:
+                max_age (float): Returns the last received value without a request if it is not older than
+                    this many seconds, default set to None (the device cache policy).
+
+            Concurrent callers share a single request and all receive its answer.
+
             Returns:
                 variable_name (str): Name of the variable.
 
             Raises:
                 CommandTimeOutError: Device did not response to command after X time.
             """
-            variable_lock = getattr(self, lock_variable_name)
-            variable_lock.acquire()
-            getattr(self, request_function_name)()
-            is_valid, elapsed = variable_lock.wait_until_released()
-            variable_lock.ensure_released()
-
-            if is_valid:
+            if max_age is None:
+                max_age = self.get_cache_max_age(variable_name)
+            if self.is_fresh(variable_name, max_age):
                 return getattr(self, variable_name)
-            else:
-                raise CMDeviceReplyTimeout(self.cmdHdl.cmd_header, request_command, elapsed)
+
+            future = shared_request()
+            try:
+                return future.result(timeout)
+            except TimeoutError:
+                raise expire_shared_request(future) from None
 
         setattr(self, get_function_name, get)
+
+        async def get_async(max_age=None):
+            """
+            Gets the variable from a coroutine, without blocking the event loop.
+            Shares the request in flight with concurrent get_<variable> callers.
+
+            Args:
+                max_age (float): Returns the last received value without a request if it is not older than
+                    this many seconds, default set to None (the device cache policy).
+
+            Returns:
+                The updated value of the variable.
+
+            Raises:
+                CMDeviceReplyTimeout: Device did not respond to command after X time.
+            """
+            if max_age is None:
+                max_age = self.get_cache_max_age(variable_name)
+            if self.is_fresh(variable_name, max_age):
+                return getattr(self, variable_name)
+
+            future = shared_request()
+            wrapped = asyncio.wrap_future(future)
+            try:
+                return await asyncio.wait_for(asyncio.shield(wrapped), timeout)
+            except asyncio.TimeoutError:
+                # The expired request fails the wrapped future too, its exception is the one raised here
+                wrapped.add_done_callback(lambda f: f.cancelled() or f.exception())
+                raise expire_shared_request(future) from None
+
+        setattr(self, get_function_name + '_async', get_async)
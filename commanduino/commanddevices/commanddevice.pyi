@@ -1,9 +1,31 @@
 import logging
-from typing import Dict
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple, Union
+from ..codec import Codec
 from ..commandhandler import GenericCommandHandler
 
 class CommandDevice:
     logger: logging.Logger
     cmdHdl: GenericCommandHandler
+    pending_requests: Dict[str, Deque[Tuple[Future, float]]]
+    registered_requests: Dict[str, Tuple[str, str, float]]
+    last_update: Dict[str, float]
+    cache_policy: Union[None, float, Dict[str, float]]
+    write: Callable[[Union[str, bytes]], None]
+    def init(self) -> None: ...
     @classmethod
     def from_config(cls, config: Dict) -> CommandDevice: ...
+    def handle_command(self, cmd: str) -> None: ...
+    def handle_tokens(self, cmd_list: List[str]) -> None: ...
+    def set_command_header(self, cmdHeader: str) -> None: ...
+    def set_codec(self, codec: Codec) -> None: ...
+    def set_write_function(self, write_func: Callable[[Union[str, bytes]], None]) -> None: ...
+    def send(self, command_id: str, *arg: Any) -> None: ...
+    def unrecognized(self, cmd: str) -> None: ...
+    def set_cache_policy(self, max_age: Union[None, float, Dict[str, float]]) -> None: ...
+    def get_cache_max_age(self, variable_name: str) -> Optional[float]: ...
+    def is_fresh(self, variable_name: str, max_age: Optional[float]) -> bool: ...
+    def prepare_request(self, variable_name: str) -> Tuple[Future, bytes]: ...
+    def register_request(self, request_command: str, answer_command: str, variable_name: str,
+                         callback_function_for_variable_update: Callable[..., None], variable_init_value: Any = None,
+                         timeout: float = ...) -> None: ...
@@ -1,5 +1,9 @@
+from concurrent.futures import Future
+from typing import Optional
 from . import CommandDevice
 
 class CommandDigitalRead(CommandDevice):
     def __init__(self): ...
-    def get_state(self) -> bool: ...
\ No newline at end of file
+    def get_state(self, max_age: Optional[float] = None) -> bool: ...
+    async def get_state_async(self, max_age: Optional[float] = None) -> bool: ...
+    def request_state_async(self) -> Future[bool]: ...
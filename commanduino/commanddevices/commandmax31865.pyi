@@ -1,7 +1,16 @@
+from concurrent.futures import Future
+from typing import Optional
 from .commanddevice import CommandDevice
 
 
-class CommandTCS34725(CommandDevice):
-    def initialization_code(self) -> None: ...
-    def get_temp(self) -> float: ...
-    def get_error_code(self) -> int: ...
+class CommandMAX31865(CommandDevice):
+    def init(self) -> None: ...
+    def get_initialization_code(self, max_age: Optional[float] = None) -> int: ...
+    async def get_initialization_code_async(self, max_age: Optional[float] = None) -> int: ...
+    def request_initialization_code_async(self) -> Future[int]: ...
+    def get_temp(self, max_age: Optional[float] = None) -> float: ...
+    async def get_temp_async(self, max_age: Optional[float] = None) -> float: ...
+    def request_temp_async(self) -> Future[float]: ...
+    def get_error_code(self, max_age: Optional[float] = None) -> int: ...
+    async def get_error_code_async(self, max_age: Optional[float] = None) -> int: ...
+    def request_error_code_async(self) -> Future[int]: ...
@@ -1,5 +1,9 @@
+from concurrent.futures import Future
+from typing import Optional
 from .commanddevice import CommandDevice
 
 class CommandMCP9600(CommandDevice):
     def __init__(self): ...
-    def get_celsius(self) -> float: ...
+    def get_celsius(self, max_age: Optional[float] = None) -> float: ...
+    async def get_celsius_async(self, max_age: Optional[float] = None) -> float: ...
+    def request_celsius_async(self) -> Future[float]: ...
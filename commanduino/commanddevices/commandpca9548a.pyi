@@ -1,5 +1,9 @@
+from concurrent.futures import Future
+from typing import Optional
 from .commanddevice import CommandDevice
 
 class CommandPCA9548A(CommandDevice):
     def set_channels(self, channels: int) -> None: ...
-    def get_channels(self) -> int: ...
+    def get_channels(self, max_age: Optional[float] = None) -> int: ...
+    async def get_channels_async(self, max_age: Optional[float] = None) -> int: ...
+    def request_channels_async(self) -> Future[int]: ...
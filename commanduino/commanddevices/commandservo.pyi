@@ -1,3 +1,5 @@
+from concurrent.futures import Future
+from typing import Optional
 from .commanddevice import CommandDevice
 
 class CommandServo(CommandDevice):
@@ -10,3 +12,6 @@ class CommandServo(CommandDevice):
     def set_limit(self, minimum: int, maximum: int) -> bool : ...
     def remove_limit(self) -> None : ...
     def set_angle(self, angle: int) -> None : ...
+    def get_angle(self, max_age: Optional[float] = None) -> int: ...
+    async def get_angle_async(self, max_age: Optional[float] = None) -> int: ...
+    def request_angle_async(self) -> Future[int]: ...
@@ -1,3 +1,5 @@
+from concurrent.futures import Future
+from typing import Optional
 from . import CommandDevice
 from ..lock import Lock
 
@@ -6,6 +8,12 @@ class CommandSHT1X(CommandDevice):
     humidity_lock: Lock
     celsius_lock: Lock
     fahrenheit_lock: Lock
-    def get_humidity(self) -> float: ...
-    def get_celsius(self) -> float: ...
-    def get_fahrenheit(self) -> float: ...
+    def get_humidity(self, max_age: Optional[float] = None) -> float: ...
+    async def get_humidity_async(self, max_age: Optional[float] = None) -> float: ...
+    def request_humidity_async(self) -> Future[float]: ...
+    def get_celsius(self, max_age: Optional[float] = None) -> float: ...
+    async def get_celsius_async(self, max_age: Optional[float] = None) -> float: ...
+    def request_celsius_async(self) -> Future[float]: ...
+    def get_fahrenheit(self, max_age: Optional[float] = None) -> float: ...
+    async def get_fahrenheit_async(self, max_age: Optional[float] = None) -> float: ...
+    def request_fahrenheit_async(self) -> Future[float]: ...
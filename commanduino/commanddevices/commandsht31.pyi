@@ -1,3 +1,5 @@
+from concurrent.futures import Future
+from typing import Optional
 from . import CommandDevice
 from ..lock import Lock
 
@@ -5,5 +7,9 @@ from ..lock import Lock
 class CommandSHT31(CommandDevice):
     humidity_lock: Lock
     celsius_lock: Lock
-    def get_humidity(self) -> float: ...
-    def get_celsius(self) -> float: ...
\ No newline at end of file
+    def get_humidity(self, max_age: Optional[float] = None) -> float: ...
+    async def get_humidity_async(self, max_age: Optional[float] = None) -> float: ...
+    def request_humidity_async(self) -> Future[float]: ...
+    def get_celsius(self, max_age: Optional[float] = None) -> float: ...
+    async def get_celsius_async(self, max_age: Optional[float] = None) -> float: ...
+    def request_celsius_async(self) -> Future[float]: ...
@@ -1,4 +1,5 @@
-from typing import Tuple
+from concurrent.futures import Future
+from typing import Optional, Tuple
 
 from .commanddevice import CommandDevice
 
@@ -6,5 +7,9 @@ from .commanddevice import CommandDevice
 class CommandTCS34725(CommandDevice):
     def set_integration_time(self, integration_time: float) -> None: ...
     def set_gain(self, gain: int) -> None: ...
-    def get_rgbc(self) -> Tuple[int, int, int, int]: ...
-    def get_initialization_code(self) -> int: ...
+    def get_rgbc(self, max_age: Optional[float] = None) -> Tuple[int, int, int, int]: ...
+    async def get_rgbc_async(self, max_age: Optional[float] = None) -> Tuple[int, int, int, int]: ...
+    def request_rgbc_async(self) -> Future[Tuple[int, int, int, int]]: ...
+    def get_initialization_code(self, max_age: Optional[float] = None) -> int: ...
+    async def get_initialization_code_async(self, max_age: Optional[float] = None) -> int: ...
+    def request_initialization_code_async(self) -> Future[int]: ...
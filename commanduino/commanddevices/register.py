@@ -28,7 +28,7 @@ def add_to_bonjour_register(bonjour_id, constructor):
     BONJOUR_REGISTER[bonjour_id] = constructor
 
 
-def create_and_setup_device(cmdHdl, command_id, bonjour_id, device_config):
+def create_and_setup_device(cmdHdl, command_id, bonjour_id, device_config, init=True):
     """
     Creates and sets up the Arduino device for usage.
 
@@ -39,18 +39,26 @@ def create_and_setup_device(cmdHdl, command_id, bonjour_id, device_config):
 
         bonjour_id (str): The Bonjour ID.
 
-        device_config (Dict): Dictionary containing the device configuration.
+        device_config (Dict): Dictionary containing the device configuration. The optional "cache_max_age"
+            entry (seconds, for all variables or per variable name) sets the device cache policy.
+
+        init (bool): Calls the device init(), default set to True. When False, the caller has to call it.
 
     Raises:
         CMDeviceRegisterError: Bonjour ID is not in the register of the device.
 
     """
     if bonjour_id in BONJOUR_REGISTER:
+        device_config = dict(device_config)
+        cache_max_age = device_config.pop('cache_max_age', None)
         device = BONJOUR_REGISTER[bonjour_id].from_config(device_config)
-        cmdHdl.add_relay(command_id, device.handle_command)
+        device.set_cache_policy(cache_max_age)
+        cmdHdl.add_route(command_id, device.handle_tokens)
         device.set_command_header(command_id)
+        device.set_codec(cmdHdl.codec)
         device.set_write_function(cmdHdl.write)
-        device.init()
+        if init:
+            device.init()
         return device
     else:
         raise CMDeviceRegisterError(bonjour_id)
\ No newline at end of file
@@ -10,12 +10,17 @@
 import time
 import serial
 import socket
+import selectors
 import threading
 import logging
-from typing import Callable, Dict, List, Union
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple, Union
 
+from .codec import Codec, TextCodec, make_codec
 from .exceptions import CMHandlerConfigurationError, CMTimeout, CMCommunicationError
 
+if TYPE_CHECKING:
+    from .reactor import CommandReactor
+
 # Default delimiter to separate commands
 DEFAULT_DELIM = ','
 
@@ -31,6 +36,28 @@ DEFAULT_BAUDRATE = 115200
 # Default timeout time
 DEFAULT_TIMEOUT = 0.01
 
+# Default encoding of the messages on the wire
+DEFAULT_ENCODING = 'utf-8'
+
+# Size of the chunks read at once from a TCP socket
+DEFAULT_RECV_SIZE = 4096
+
+# Largest payload a UDP datagram can carry
+MAX_DATAGRAM_SIZE = 65535
+
+# Longest frame received, terminator excluded, longer ones are handled by the overflow policy
+DEFAULT_MAX_FRAME_SIZE = 1024
+
+# Overflow policies, i.e. what to do with a frame longer than the maximum frame size:
+# drop the buffered data and parse the following bytes as a new frame,
+OVERFLOW_DROP = 'drop'
+# handle the start of the frame and drop the rest, up to the next terminator,
+OVERFLOW_TRUNCATE = 'truncate'
+# or drop the whole frame and resume after the next terminator.
+OVERFLOW_RESYNC = 'resync'
+OVERFLOW_POLICIES = (OVERFLOW_DROP, OVERFLOW_TRUNCATE, OVERFLOW_RESYNC)
+DEFAULT_OVERFLOW_POLICY = OVERFLOW_RESYNC
+
 
 class CommandHandler(object):
     """
@@ -43,6 +70,15 @@ class CommandHandler(object):
 
         cmd_decimal: Decimal of the command, default set to DEFAULT_CMD_DECIMAL(2)
 
+        codec: The wire format, see make_codec, default set to None (text commands)
+
+        max_frame_size: Longest frame received, terminator excluded, default set to DEFAULT_MAX_FRAME_SIZE (1024)
+
+        overflow: What to do with longer frames, one of OVERFLOW_POLICIES, default set to DEFAULT_OVERFLOW_POLICY
+
+    Raises:
+        CMHandlerConfigurationError: Invalid maximum frame size or overflow policy.
+
     """
 
     @classmethod
@@ -62,7 +98,8 @@ class CommandHandler(object):
         return cls(**config)
 
     def __init__(self, delim: str = DEFAULT_DELIM, term: str = DEFAULT_TERM, cmd_decimal: int = DEFAULT_CMD_DECIMAL,
-                 **kwargs):
+                 codec: Union[None, str, Dict, Codec] = None, max_frame_size: int = DEFAULT_MAX_FRAME_SIZE,
+                 overflow: str = DEFAULT_OVERFLOW_POLICY, **kwargs):
         self.logger = logging.getLogger(__name__).getChild(self.__class__.__name__)
 
         # Something descriptive to reference the handler in logs.
@@ -71,14 +108,58 @@ class CommandHandler(object):
         self.delim = delim  # character separating args in a message
         self.term = term  # character ending a message
 
-        self.buffer = ''  # string that will hold the received data
-
+        if overflow not in OVERFLOW_POLICIES:
+            raise CMHandlerConfigurationError(f"Unknown overflow policy <{overflow}>, expected one of "
+                                              f"{OVERFLOW_POLICIES}!")
+        if max_frame_size <= 0:
+            raise CMHandlerConfigurationError(f"Invalid maximum frame size <{max_frame_size}>!")
+        self.max_frame_size = max_frame_size
+        self.overflow = overflow
+        # Holds the received data until a terminator arrives, at most max_frame_size bytes between two chunks
+        self.buffer = bytearray()
+        self._skipping = False  # dropping the received data up to the next terminator, after an overflow
+        # Receive counters: frames longer than max_frame_size, resyncs on a terminator after an overflow,
+        # bytes dropped by the overflow policy and frames the codec could not decode.
+        self.overflows = 0
+        self.resyncs = 0
+        self.dropped_bytes = 0
+        self.invalid_frames = 0
+        self.set_codec(make_codec(codec, delim, term))
+        self.first_byte_time: Optional[float] = None  # time.monotonic() of the first data received
+        self.on_first_data: Optional[Callable[[], None]] = None  # called when the first data is received
+
+        # Change these with the add_/remove_ methods, they keep the dispatch tables up to date
         self.handlers: Dict[str, List[Callable]] = {}
+        self.routes: Dict[str, List[Callable]] = {}
         self.relays: Dict[str, List[Callable]] = {}
         self.default_handlers: List[Callable] = []
 
+        # (callbacks, routes, relays) called per command id, and the default handlers, rebuilt on every change.
+        # Being immutable, they can be changed by a thread while the reader thread dispatches a command.
+        self._dispatch: Dict[str, Tuple[Tuple[Callable, ...], Tuple[Callable, ...], Tuple[Callable, ...]]] = {}
+        self._default_dispatch: Tuple[Callable, ...] = ()
+
         self.cmd_header = ''
         self.cmd_decimal = cmd_decimal
+        # Encoded cmd_header + command_id per command id, cleared when the header changes
+        self._prefixes: Dict[str, bytes] = {}
+        self._delim_bytes = delim.encode(DEFAULT_ENCODING)
+        self._term = term.encode(DEFAULT_ENCODING)
+        # Fields preceding the command id in the commands of a non-text codec, see set_command_header
+        self._header_fields: Tuple[str, ...] = ()
+        self._id_prefix = ''
+
+    def set_codec(self, codec: Codec) -> None:
+        """
+        Sets the wire format of the commands, see the codec module.
+
+        Args:
+            codec: The codec.
+
+        """
+        self.codec = codec
+        self._term_bytes = codec.terminator
+        self._text = isinstance(codec, TextCodec)
 
     def process_char(self, a_char: bytes) -> None:
         """
@@ -89,13 +170,145 @@ class CommandHandler(object):
             a_char: The character to be processed
 
         """
-        if a_char:
-            decoded_char = a_char.decode(encoding="utf-8", errors="ignore")
-            if decoded_char == self.term:
-                self.handle(self.buffer)
-                self.buffer = ''
-            else:
-                self.buffer += decoded_char
+        self.process_bytes(a_char)
+
+    def process_bytes(self, data: Union[bytes, bytearray, memoryview]) -> None:
+        """
+        Adds a chunk of received data to the receiving buffer and handles every complete command in it.
+        Incomplete trailing data is kept in the buffer until its terminator arrives.
+
+        Frames longer than max_frame_size are handled according to the overflow policy, so that the
+        buffer never keeps more than max_frame_size bytes, e.g. when a board sends garbage while booting.
+
+        Args:
+            data: The received data, any bytes-like object.
+
+        """
+        if not data:
+            return
+        if self.first_byte_time is None:
+            self.first_byte_time = time.monotonic()
+            if self.on_first_data is not None:
+                self.on_first_data()
+        if self._skipping:
+            term = self._term_bytes
+            data = bytes(data)  # socket handlers pass memoryviews, which cannot be searched
+            end = data.find(term)
+            if end == -1:
+                self.dropped_bytes += len(data)
+                return
+            self.dropped_bytes += end
+            frame = self._end_overflow()
+            self.buffer += data[end + len(term):]
+            if frame:
+                self.handle_frame(frame)
+        else:
+            self.buffer += data
+        self.handle_buffer()
+
+    def handle_buffer(self) -> None:
+        """
+        Handles every complete command of the receiving buffer.
+
+        A callback raising an exception stops the handling, the frame it was given is removed
+        from the buffer, the following ones are kept: call again to handle them.
+        """
+        buffer = self.buffer
+        term = self._term_bytes
+        max_frame_size = self.max_frame_size
+        start = 0
+        end = buffer.find(term)
+        try:
+            while end != -1:
+                frame_start, start = start, end + len(term)
+                if end - frame_start > max_frame_size:
+                    self._overflow_frame(buffer[frame_start:end])
+                else:
+                    self.handle_frame(buffer[frame_start:end])
+                end = buffer.find(term, start)
+        finally:
+            # Frames already handled are removed even if a callback raised, so that they are not handled again
+            if start:
+                del buffer[:start]
+        if len(buffer) > max_frame_size:
+            self._overflow_buffer()
+
+    def _overflow_frame(self, frame: Union[bytes, bytearray, memoryview]) -> None:
+        """
+        Handles a complete frame longer than max_frame_size, according to the overflow policy.
+        """
+        self.overflows += 1
+        self.logger.warning('Frame of %d bytes longer than %d bytes on %s, %s',
+                            len(frame), self.max_frame_size, self.name, self.overflow)
+        if self.overflow == OVERFLOW_TRUNCATE:
+            self.dropped_bytes += len(frame) - self.max_frame_size
+            self.handle_frame(frame[:self.max_frame_size])
+        else:
+            self.dropped_bytes += len(frame)
+
+    def _overflow_buffer(self) -> None:
+        """
+        Bounds the buffer holding an incomplete frame longer than max_frame_size, according to the overflow policy.
+        """
+        buffer = self.buffer
+        self.overflows += 1
+        self.logger.warning('More than %d bytes received without terminator on %s, %s',
+                            self.max_frame_size, self.name, self.overflow)
+        if self.overflow == OVERFLOW_TRUNCATE:
+            self.dropped_bytes += len(buffer) - self.max_frame_size
+            del buffer[self.max_frame_size:]
+        else:
+            self.dropped_bytes += len(buffer)
+            buffer.clear()
+        self._skipping = self.overflow != OVERFLOW_DROP
+
+    def _end_overflow(self) -> Optional[bytes]:
+        """
+        Ends the skipping of the data following an overflow, once the terminator of the oversized frame is received.
+
+        Returns:
+            The start of the truncated frame, to be handled, None if the frame was dropped.
+
+        """
+        self._skipping = False
+        self.resyncs += 1
+        frame = bytes(self.buffer) if self.buffer else None
+        self.buffer.clear()
+        return frame
+
+    def handle_frame(self, frame: Union[bytes, bytearray, memoryview]) -> None:
+        """
+        Decodes a received frame with the codec and handles the command.
+
+        Args:
+            frame: The frame, without its terminator.
+
+        """
+        cmd_list = self.codec.decode(frame)
+        if cmd_list is None:
+            self.invalid_frames += 1
+            self.logger.debug('Dropped invalid frame %s', bytes(frame))
+            return
+        self.handle_tokens(cmd_list)
+
+    def process_datagram(self, data: Union[bytes, bytearray, memoryview]) -> None:
+        """
+        Processes a self-contained unit of data, such as a UDP datagram.
+        The end of the data terminates the last command even without a terminator,
+        nothing is carried over to the next unit.
+
+        Args:
+            data: The received data, any bytes-like object.
+
+        """
+        try:
+            self.process_bytes(data)
+            frame = self._end_overflow() if self._skipping else self.buffer
+            if frame:
+                self.handle_frame(frame)
+        finally:
+            self._skipping = False
+            self.buffer.clear()
 
     def handle(self, cmd: str):
         """
@@ -106,27 +319,70 @@ class CommandHandler(object):
 
         """
         cmd = cmd.strip().strip(self.term)
-        cmd_list = cmd.split(self.delim)
+        self.handle_tokens(cmd.split(self.delim), cmd)
+
+    def handle_tokens(self, cmd_list: List[str], cmd: Optional[str] = None):
+        """
+        Handles a command already split into its id and arguments.
+
+        Callbacks get the arguments, routes get the list of arguments as is, relays get the
+        arguments joined back into a command. Routes and relays are called only when no
+        callback is assigned to the command id, and default handlers when nothing is.
+
+        Args:
+            cmd_list: The command id followed by the arguments.
+
+            cmd: The command as received, rebuilt from cmd_list for the default handlers if not given.
+
+        """
+        if not cmd_list:
+            # Routed frame holding only the id of the route, e.g. "D1;", handled as an empty command
+            cmd_list = ['']
         cmd_id = cmd_list[0]
+        entry = self._dispatch.get(cmd_id)
+        debug = self.logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            self.logger.debug('Handling %s', cmd_list, extra={'cmd_list': cmd_list, 'cmd_id': cmd_id})
+
+        if entry is None:
+            if debug:
+                self.logger.debug('No callback assigned to "%s", defaulting', cmd_id)
+            if cmd is None:
+                cmd = self.delim.join(cmd_list)
+            for clb in self._default_dispatch:
+                clb(cmd)  # give back what was received
+            return
+
+        callbacks, routes, relays = entry
+        for clb in callbacks:
+            if debug:
+                self.logger.debug('Found callback for "%s"', cmd_id, extra={'callback_function': clb})
+            clb(*cmd_list[1:])  # all args in the command are given to the callback function as arguments
+        for clb in routes:
+            if debug:
+                self.logger.debug('Found route for "%s"', cmd_id, extra={'route_function': clb})
+            clb(cmd_list[1:])
+        for clb in relays:
+            if debug:
+                self.logger.debug('Found relay for "%s"', cmd_id, extra={'relay_function': clb})
+            clb(self.build_remaining(cmd_list))
+
+    def _update_dispatch(self, command_id: str) -> None:
+        """
+        Rebuilds the dispatch table entry of a command id after a change of its callbacks, routes or relays.
+        Callbacks take precedence, routes and relays are only called when no callback was ever added.
 
-        self.logger.debug('Handling "{}"'.format(cmd),
-                          extra={'cmd_list': cmd_list,
-                                 'cmd_id': cmd_id})
-
-        if cmd_id in self.handlers:
-            for clb in self.handlers[cmd_id]:
-                self.logger.debug('Found callback for "{}"'.format(cmd_id),
-                                  extra={'callback_function': clb})
-                clb(*cmd_list[1:])  # all args in the command are given to the callback function as arguments
-        elif cmd_id in self.relays:
-            for clb in self.relays[cmd_id]:
-                self.logger.debug('Found relay for "{}"'.format(cmd_id),
-                                  extra={'relay_function': clb})
-                clb(self.build_remaining(cmd_list))
+        Args:
+            command_id: The ID of the command.
+
+        """
+        if command_id in self.handlers:
+            self._dispatch[command_id] = (tuple(self.handlers[command_id]), (), ())
+        elif command_id in self.routes or command_id in self.relays:
+            self._dispatch[command_id] = ((), tuple(self.routes.get(command_id, ())),
+                                          tuple(self.relays.get(command_id, ())))
         else:
-            self.logger.debug('No callback assigned to "{}", defaulting'.format(cmd_id))
-            for clb in self.default_handlers:
-                clb(cmd)  # give back what was received
+            self._dispatch.pop(command_id, None)
 
     def build_remaining(self, cmd_list: List[str]) -> str:
         """
@@ -152,6 +408,7 @@ class CommandHandler(object):
             self.handlers[command_id] = []
         if callback_function not in self.handlers[command_id]:
             self.handlers[command_id].append(callback_function)
+        self._update_dispatch(command_id)
 
     def remove_command(self, command_id: str, callback_function: Callable) -> None:
         """
@@ -166,6 +423,38 @@ class CommandHandler(object):
         if command_id in self.handlers:
             if callback_function in self.handlers[command_id]:
                 self.handlers[command_id].remove(callback_function)
+        self._update_dispatch(command_id)
+
+    def add_route(self, command_id: str, callback_function: Callable) -> None:
+        """
+        Adds a route to the Handler, a relay getting the arguments of the command already split.
+
+        Args:
+            command_id: The ID of the command.
+
+            callback_function: Called with the list of arguments, e.g. a device handle_tokens.
+
+        """
+        if command_id not in self.routes:
+            self.routes[command_id] = []
+        if callback_function not in self.routes[command_id]:
+            self.routes[command_id].append(callback_function)
+        self._update_dispatch(command_id)
+
+    def remove_route(self, command_id: str, callback_function: Callable) -> None:
+        """
+        Removes a route from the Handler.
+
+        Args:
+            command_id: The ID of the command.
+
+            callback_function: The function added as route.
+
+        """
+        if command_id in self.routes:
+            if callback_function in self.routes[command_id]:
+                self.routes[command_id].remove(callback_function)
+        self._update_dispatch(command_id)
 
     def add_relay(self, command_id: str, callback_function: Callable) -> None:
         """
@@ -181,6 +470,7 @@ class CommandHandler(object):
             self.relays[command_id] = []
         if callback_function not in self.relays[command_id]:
             self.relays[command_id].append(callback_function)
+        self._update_dispatch(command_id)
 
     def remove_relay(self, command_id: str, callback_function: Callable) -> None:
         """
@@ -195,6 +485,7 @@ class CommandHandler(object):
         if command_id in self.relays:
             if callback_function in self.relays[command_id]:
                 self.relays[command_id].remove(callback_function)
+        self._update_dispatch(command_id)
 
     def add_default_handler(self, callback_function: Callable) -> None:
         """
@@ -206,6 +497,7 @@ class CommandHandler(object):
         """
         if callback_function not in self.default_handlers:
             self.default_handlers.append(callback_function)
+        self._default_dispatch = tuple(self.default_handlers)
 
     def remove_default_handler(self, callback_function: Callable) -> None:
         """
@@ -217,6 +509,7 @@ class CommandHandler(object):
         """
         if callback_function in self.default_handlers:
             self.default_handlers.remove(callback_function)
+        self._default_dispatch = tuple(self.default_handlers)
 
     #
     def set_command_header(self, cmd_header: str, add_delim: bool = True) -> None:
@@ -229,9 +522,12 @@ class CommandHandler(object):
             add_delim: Adds a delimiter to the command, default set to True.
 
         """
+        self._header_fields = (cmd_header,) if add_delim and cmd_header else ()
+        self._id_prefix = '' if add_delim else cmd_header
         self.cmd_header = cmd_header
         if add_delim:
             self.cmd_header += self.delim
+        self._prefixes = {}
         self.logger.debug('Set command header to "{}"'.format(self.cmd_header))
 
     def set_command_decimal(self, cmd_decimal: int) -> None:
@@ -247,7 +543,7 @@ class CommandHandler(object):
 
     def forge_command(self, command_id: str, *args) -> str:
         """
-        Creates a full Arduino command.
+        Creates a full Arduino command, as text whatever the codec.
 
         Args:
             command_id: The ID of the command.
@@ -255,22 +551,185 @@ class CommandHandler(object):
             *args: Variable length argument list.
 
         """
-        cmd = self.cmd_header
-        cmd += command_id
-        for arg in args:
-            cmd += self.delim
-            if type(arg) == float:
-                cmd += str(round(arg, self.cmd_decimal))
-            else:
-                cmd += str(arg)
-        cmd += self.term
+        return self.forge_text_command(command_id, *args).decode(DEFAULT_ENCODING)
 
-        self.logger.debug('Forged "{}"'.format(cmd),
-                          extra={'command_id': command_id,
-                                 'arguments': args})
+    def forge_command_bytes(self, command_id: str, *args) -> bytes:
+        """
+        Creates a full Arduino command, encoded with the codec, ready to be written.
+
+        Args:
+            command_id: The ID of the command.
+
+            *args: Variable length argument list.
 
+        """
+        if self._text:
+            return self.forge_text_command(command_id, *args)
+        cmd = self.codec.encode(self._header_fields + (self._id_prefix + command_id,) + args, self.cmd_decimal)
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug('Forged %s', cmd, extra={'command_id': command_id, 'arguments': args})
         return cmd
 
+    def forge_text_command(self, command_id: str, *args) -> bytes:
+        """
+        Creates a full Arduino text command, encoded.
+
+        The encoded header and command id are cached per command id. Floats are written
+        with cmd_decimal decimals, e.g. 1.5 as 1.50 with the default 2.
+
+        Args:
+            command_id: The ID of the command.
+
+            *args: Variable length argument list.
+
+        """
+        prefix = self._prefixes.get(command_id)
+        if prefix is None:
+            prefix = self._prefixes[command_id] = (self.cmd_header + command_id).encode(DEFAULT_ENCODING)
+        if not args:
+            cmd = prefix + self._term
+        else:
+            buffer = bytearray(prefix)
+            delim = self._delim_bytes
+            for arg in args:
+                buffer += delim
+                arg_type = type(arg)
+                if arg_type is float:
+                    buffer += b'%.*f' % (self.cmd_decimal, arg)
+                elif arg_type is int:
+                    buffer += b'%d' % arg
+                else:
+                    buffer += str(arg).encode(DEFAULT_ENCODING)
+            buffer += self._term
+            cmd = bytes(buffer)
+
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug('Forged "%s"', cmd, extra={'command_id': command_id, 'arguments': args})
+
+        return cmd
+
+
+class StopSignal(object):
+    """
+    Wakes up a reader blocked on a selector, so that it can be stopped immediately.
+    """
+    def __init__(self):
+        self._reader, self._writer = socket.socketpair()
+        self._reader.setblocking(False)
+        self._writer.setblocking(False)
+
+    def fileno(self) -> int:
+        """
+        Returns the file descriptor to register in a selector.
+        """
+        return self._reader.fileno()
+
+    def set(self) -> None:
+        """
+        Signals the reader, the file descriptor becomes readable.
+        """
+        try:
+            self._writer.send(b'\0')
+        except OSError:
+            pass  # already signalled or closed
+
+    def clear(self) -> None:
+        """
+        Consumes pending signals, so that the signal can be waited on again.
+        """
+        try:
+            while self._reader.recv(4096):
+                pass
+        except OSError:
+            pass  # nothing left to read
+
+    def close(self) -> None:
+        """
+        Closes the underlying socket pair.
+        """
+        self._reader.close()
+        self._writer.close()
+
+
+def create_selector(fileobj, stop_signal: StopSignal) -> Optional[selectors.BaseSelector]:
+    """
+    Creates a selector waiting for data on a link or for a stop signal.
+
+    Args:
+        fileobj: The link to wait on, any object with a fileno() method.
+
+        stop_signal: The signal used to interrupt the wait.
+
+    Returns:
+        The selector, or None if the link cannot be waited on (e.g. serial ports on Windows).
+
+    """
+    selector = selectors.DefaultSelector()
+    try:
+        selector.register(fileobj, selectors.EVENT_READ)
+        selector.register(stop_signal, selectors.EVENT_READ)
+    except (AttributeError, OSError, ValueError):
+        selector.close()
+        return None
+    return selector
+
+
+def wait_for_data(selector: selectors.BaseSelector, stop_signal: StopSignal) -> bool:
+    """
+    Blocks until data is available on the link or the stop signal is set.
+
+    Args:
+        selector: A selector made by create_selector.
+
+        stop_signal: The signal used to interrupt the wait.
+
+    Returns:
+        True if data can be read, False if the wait was interrupted.
+
+    """
+    for key, _ in selector.select():
+        if key.fileobj is stop_signal:
+            return False
+    return True
+
+
+def open_serial_port(port: str, baudrate: int, timeout: Optional[float], dtr: Optional[bool] = None,
+                     rts: Optional[bool] = None) -> serial.Serial:
+    """
+    Opens a serial port, with the DTR and RTS lines set before opening when given.
+
+    Most Arduino boards reset when DTR is asserted on open, keeping it low attaches to a running
+    board without resetting it. Some systems assert DTR on open whatever the setting, unless
+    their hang up on close is disabled (e.g. stty -F <port> -hupcl).
+
+    Args:
+        port: The port to open.
+
+        baudrate: The baudrate of the serial communication.
+
+        timeout: The read timeout.
+
+        dtr: State of the DTR line on open, default set to None (pyserial default, asserted).
+
+        rts: State of the RTS line on open, default set to None (pyserial default, asserted).
+
+    Returns:
+        The open port.
+
+    """
+    if dtr is None and rts is None:
+        return serial.Serial(port, baudrate, timeout=timeout)
+    a_serial = serial.Serial()
+    a_serial.port = port
+    a_serial.baudrate = baudrate
+    a_serial.timeout = timeout
+    if dtr is not None:
+        a_serial.dtr = dtr
+    if rts is not None:
+        a_serial.rts = rts
+    a_serial.open()
+    return a_serial
+
 
 class SerialCommandHandler(threading.Thread, CommandHandler):
     """
@@ -289,20 +748,38 @@ class SerialCommandHandler(threading.Thread, CommandHandler):
 
         cmd_decimal: The decimal of the command, default set to DEFAULT_CMD_DECIMAL (2)
 
+        dtr: State of the DTR line on open, False not to reset the board, default set to None (asserted)
+
+        rts: State of the RTS line on open, default set to None (asserted)
+
+        codec: The wire format, see make_codec, default set to None (text commands)
+
+        max_frame_size: Longest frame received, terminator excluded, default set to DEFAULT_MAX_FRAME_SIZE (1024)
+
+        overflow: What to do with longer frames, one of OVERFLOW_POLICIES, default set to DEFAULT_OVERFLOW_POLICY
+
     """
     def __init__(self, port: str, baudrate: int = DEFAULT_BAUDRATE, timeout: float = DEFAULT_TIMEOUT,
-                 delim: str = DEFAULT_DELIM, term: str = DEFAULT_TERM, cmd_decimal: int = DEFAULT_CMD_DECIMAL):
+                 delim: str = DEFAULT_DELIM, term: str = DEFAULT_TERM, cmd_decimal: int = DEFAULT_CMD_DECIMAL,
+                 dtr: Optional[bool] = None, rts: Optional[bool] = None,
+                 codec: Union[None, str, Dict, Codec] = None, max_frame_size: int = DEFAULT_MAX_FRAME_SIZE,
+                 overflow: str = DEFAULT_OVERFLOW_POLICY):
         threading.Thread.__init__(self)
         self.daemon = True
         self.interrupted = threading.Lock()
+        self._stop_signal = StopSignal()
+        # Set when the port is read by a CommandReactor rather than by this thread
+        self.reactor: Optional['CommandReactor'] = None
+        self._write_lock = threading.Lock()  # keeps the messages written from several threads whole
 
         self.logger = logging.getLogger(__name__).getChild(self.__class__.__name__)
 
-        CommandHandler.__init__(self, delim, term, cmd_decimal)
+        CommandHandler.__init__(self, delim, term, cmd_decimal, codec, max_frame_size, overflow)
         self.name = port
-        self.open(port, baudrate, timeout)
+        self.open(port, baudrate, timeout, dtr, rts)
 
-    def open(self, port: str, baudrate: int, timeout: float) -> None:
+    def open(self, port: str, baudrate: int, timeout: float, dtr: Optional[bool] = None,
+             rts: Optional[bool] = None) -> None:
         """
         Opens the serial communication between the PC and Arduino board.
 
@@ -313,13 +790,19 @@ class SerialCommandHandler(threading.Thread, CommandHandler):
 
             timeout: The time to wait for timeout.
 
+            dtr: State of the DTR line on open, default set to None (asserted).
+
+            rts: State of the RTS line on open, default set to None (asserted).
+
         """
         self.logger.debug('Opening port {}'.format(port),
                           extra={'port': port,
                                  'baudrate': baudrate,
-                                 'timeout': timeout})
+                                 'timeout': timeout,
+                                 'dtr': dtr,
+                                 'rts': rts})
         try:
-            self._serial = serial.Serial(port, baudrate, timeout=timeout)
+            self._serial = open_serial_port(port, baudrate, timeout, dtr, rts)
         except (serial.SerialException, TypeError, ValueError) as e:
             raise CMHandlerConfigurationError(str(e))
 
@@ -330,6 +813,8 @@ class SerialCommandHandler(threading.Thread, CommandHandler):
         if hasattr(self, "_serial"):
             self._serial.close()
             self.logger.debug('Closing port "{}"'.format(self._serial.port))
+        if hasattr(self, "_stop_signal"):
+            self._stop_signal.close()
 
     def __del__(self):
         """
@@ -355,18 +840,49 @@ class SerialCommandHandler(threading.Thread, CommandHandler):
         """
         Releases the lock when signalled via an interrupt.
         """
+        if self.reactor is not None:
+            self.reactor.unregister(self)
+            return
         self.interrupted.release()
+        self._stop_signal.set()
+
+    def fileno(self) -> int:
+        """
+        Returns the file descriptor of the serial port, so that the handler can be registered in a selector.
+        """
+        return self._serial.fileno()
+
+    def process_incoming(self) -> None:
+        """
+        Processes the data available on the port, used when the port is read by a CommandReactor.
+
+        Raises:
+            CMTimeout: Error reading from the port.
+
+        """
+        try:
+            self.process_serial(self._serial)
+        except (serial.SerialException, serial.SerialTimeoutException) as e:
+            raise CMTimeout(f"Error reading from serial port {self._serial.port}! {e}") from None
 
     def run(self) -> None:
         """
         Starts the Handler processing commands.
+        The thread sleeps until data arrives on the port. Where the port cannot be
+        waited on, it falls back to polling with the port timeout.
         """
         self.interrupted.acquire()
+        selector = create_selector(self._serial, self._stop_signal)
+        if selector is None:
+            self.logger.debug('Cannot wait on port "%s", polling it instead', self._serial.port)
         while self.interrupted.locked():
             try:
-                self.process_serial(self._serial)
+                if selector is None or wait_for_data(selector, self._stop_signal):
+                    self.process_serial(self._serial)
             except (serial.SerialException, serial.SerialTimeoutException) as e:
                 raise CMTimeout(f"Error reading from serial port {self._serial.port}! {e}") from None
+        if selector is not None:
+            selector.close()
         self.close()
 
     def send(self, command_id: str, *arg) -> None:
@@ -379,31 +895,36 @@ class SerialCommandHandler(threading.Thread, CommandHandler):
             *arg: Variable argument.
 
         """
-        self.write(self.forge_command(command_id, *arg))
+        self.write(self.forge_command_bytes(command_id, *arg))
 
-    def write(self, msg: str) -> None:
+    def write(self, msg: Union[str, bytes]) -> None:
         """
         Writes a message over the serial communication.
 
         Args:
-            msg (str): The message to send.
+            msg (str or bytes): The message to send, bytes are written as is.
 
         """
-        self.logger.debug('Sending "{}" on port "{}"'.format(msg, self._serial.port))
+        self.logger.debug('Sending "%s" on port "%s"', msg, self._serial.port)
+        if isinstance(msg, str):
+            msg = msg.encode(DEFAULT_ENCODING)
         try:
-            self._serial.write(msg.encode())
+            with self._write_lock:
+                self._serial.write(msg)
         except serial.SerialException as e:
             raise CMCommunicationError(f"Error writing to serial port {self._serial.port}! {e}") from None
 
     def process_serial(self, a_serial: serial.Serial) -> None:
         """
         Processes the serial communication to obtain data to be processed.
+        Everything already waiting in the input buffer is read at once, otherwise
+        a single byte is awaited for up to the port timeout.
 
         Args:
             a_serial: The serial to read from.
 
         """
-        self.process_char(a_serial.read(1))
+        self.process_bytes(a_serial.read(a_serial.in_waiting or 1))
 
     def wait_until_running(self, sleep_time: float = 0.01) -> None:
         """
@@ -436,23 +957,40 @@ class TCPIPCommandHandler(threading.Thread, CommandHandler):
 
         cmd_decimal: The decimal of the command, default set to DEFAULT_CMD_DECIMAL (2)
 
+        codec: The wire format, see make_codec, default set to None (text commands)
+
+        max_frame_size: Longest frame received, terminator excluded, default set to DEFAULT_MAX_FRAME_SIZE (1024)
+
+        overflow: What to do with longer frames, one of OVERFLOW_POLICIES, default set to DEFAULT_OVERFLOW_POLICY
+
     """
     def __init__(self, port: str, address: str, protocol: str = "TCP", timeout: float = DEFAULT_TIMEOUT,
-                 delim: str = DEFAULT_DELIM, term: str = DEFAULT_TERM, cmd_decimal: int = DEFAULT_CMD_DECIMAL):
+                 delim: str = DEFAULT_DELIM, term: str = DEFAULT_TERM, cmd_decimal: int = DEFAULT_CMD_DECIMAL,
+                 codec: Union[None, str, Dict, Codec] = None, max_frame_size: int = DEFAULT_MAX_FRAME_SIZE,
+                 overflow: str = DEFAULT_OVERFLOW_POLICY):
         threading.Thread.__init__(self)
         self.daemon = True
         self.interrupted = threading.Event()
         self.interrupted.clear()
+        self._stop_signal = StopSignal()
+        # Set when the socket is read by a CommandReactor rather than by this thread
+        self.reactor: Optional['CommandReactor'] = None
+        self._write_lock = threading.Lock()  # keeps the messages written from several threads whole
 
         self.logger = logging.getLogger(__name__).getChild(self.__class__.__name__)
 
-        CommandHandler.__init__(self, delim, term, cmd_decimal)
+        CommandHandler.__init__(self, delim, term, cmd_decimal, codec, max_frame_size, overflow)
 
         self.name = address + ":" + port
 
         self._connection: socket.socket = None  # type: ignore
 
-        self.open(port, address, protocol.upper(), timeout)
+        self.protocol = protocol.upper()
+        # Reusable receive buffer, a datagram has to fit in it entirely
+        self._recv_buffer = bytearray(MAX_DATAGRAM_SIZE if self.protocol == "UDP" else DEFAULT_RECV_SIZE)
+        self._recv_view = memoryview(self._recv_buffer)
+
+        self.open(port, address, self.protocol, timeout)
 
     def open(self, port: str, address: str, protocol: str, timeout: float):
         """
@@ -491,6 +1029,7 @@ class TCPIPCommandHandler(threading.Thread, CommandHandler):
         Closes the communication between the PC and Arduino board.
         """
         self._connection.close()
+        self._stop_signal.close()
         self.logger.debug("Connection closed.")
 
     def __del__(self):
@@ -517,14 +1056,35 @@ class TCPIPCommandHandler(threading.Thread, CommandHandler):
         """
         Releases the lock when signalled via an interrupt.
         """
+        if self.reactor is not None:
+            self.reactor.unregister(self)
+            return
         self.interrupted.set()
+        self._stop_signal.set()
+
+    def fileno(self) -> int:
+        """
+        Returns the file descriptor of the socket, so that the handler can be registered in a selector.
+        """
+        return self._connection.fileno()
+
+    def process_incoming(self) -> None:
+        """
+        Processes the data available on the socket, used when the socket is read by a CommandReactor.
+        """
+        self.process_data()
 
     def run(self) -> None:
         """
         Starts the Handler processing commands.
+        The thread sleeps until data arrives on the socket.
         """
+        selector = create_selector(self._connection, self._stop_signal)
         while not self.interrupted.is_set():
-            self.process_data()
+            if selector is None or wait_for_data(selector, self._stop_signal):
+                self.process_data()
+        if selector is not None:
+            selector.close()
         self.close()
 
     def send(self, command_id: str, *arg) -> None:
@@ -538,31 +1098,45 @@ class TCPIPCommandHandler(threading.Thread, CommandHandler):
 
         """
         try:
-            self.write(self.forge_command(command_id, *arg))
+            self.write(self.forge_command_bytes(command_id, *arg))
         except OSError as e:
             raise CMCommunicationError(f"Error writing to socket! {e}") from None
 
-    def write(self, msg: str) -> None:
+    def write(self, msg: Union[str, bytes]) -> None:
         """
         Writes raw data into the socket.
 
         Args:
-            msg: The message to send.
+            msg: The message to send, bytes are written as is.
 
         """
-        self.logger.debug('Sending "%s" to "%s"', msg, self._connection.getpeername())
-        self._connection.send(msg.encode())
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug('Sending "%s" to "%s"', msg, self._connection.getpeername())
+        if isinstance(msg, str):
+            msg = msg.encode(DEFAULT_ENCODING)
+        with self._write_lock:
+            self._connection.sendall(msg)
 
     def process_data(self) -> None:
         """
         Gets the data from socket to be processed.
+        Reads as much as is available into the receive buffer, each UDP datagram is processed as a whole.
         """
         try:
-            self.process_char(self._connection.recv(1))
+            n_bytes = self._connection.recv_into(self._recv_buffer)
         except socket.timeout:
-            pass
+            return
         except OSError as e:
             raise CMCommunicationError(f"Error reading from socket! {e}")
+        if n_bytes == 0 and self.protocol == "TCP":
+            # An empty read on a readable TCP socket means the peer has gone away
+            self.logger.warning("Connection closed by %s", self.name)
+            self.stop()
+            return
+        if self.protocol == "UDP":
+            self.process_datagram(self._recv_view[:n_bytes])
+        else:
+            self.process_bytes(self._recv_view[:n_bytes])
 
     def wait_until_running(self) -> None:
         """
@@ -8,17 +8,21 @@
 """
 from .commandhandler import SerialCommandHandler
 from .commandhandler import TCPIPCommandHandler
+from .reactor import CommandReactor
+from .startuptrace import StartupTrace
 
 from .commanddevices.register import create_and_setup_device
 from .commanddevices.register import DEFAULT_REGISTER
 
-from .exceptions import (CMManagerConfigurationError,
+from .exceptions import (CMError,
+                         CMManagerConfigurationError,
                          CMHandlerConfigurationError,
                          CMHandlerDiscoveryTimeout,
                          CMDeviceConfigurationError,
                          CMBonjourTimeout,
                          CMDeviceDiscoveryTimeout,
                          CMDeviceRegisterError,
+                         CMDeviceReplyTimeout,
                          CMCommunicationError)
 
 from .lock import Lock
@@ -27,21 +31,46 @@ from .commanddevices import CommandDevice
 
 import time
 import json
+import hashlib
 import logging
+import functools
+import threading
+import concurrent.futures
 from typing import Optional, Any
 
-from typing import Dict, List, Tuple
+from typing import Callable, Dict, List, Tuple, Union
 from commanduino.commandhandler import GenericCommandHandler
 
-# Default initialisation timeout
+# Default initialisation timeout, the longest interval between two init probes
 DEFAULT_INIT_TIMEOUT = 1
 
-# Default amount of times to attempt initialisation
+# Default amount of times to attempt initialisation, the init deadline is DEFAULT_INIT_TIMEOUT times this
 DEFAULT_INIT_N_REPEATS = 5
 
+# First interval between two init probes, doubled after each probe up to the init timeout
+DEFAULT_INIT_PROBE_INTERVAL = 0.05
+
+# Share of the boot latency recorded on a previous start after which the first init probe is sent
+BOOT_LATENCY_MARGIN = 0.8
+
 # Default timeout value
 DEFAULT_BONJOUR_TIMEOUT = 0.1
 
+# Time to wait for the bonjour replies of all devices broadcast at once, per round
+DEFAULT_DISCOVERY_TIMEOUT = 0.5
+
+# Number of broadcasts sent for devices that have not replied yet
+DEFAULT_DISCOVERY_ROUNDS = 2
+
+# Largest write of bonjour probes, the serial receive buffer of an Arduino holds 64 bytes
+DEFAULT_PROBE_WRITE_SIZE = 64
+
+# Longest wait for the replies to a write of probes before the next write
+DEFAULT_PROBE_WRITE_INTERVAL = 0.02
+
+# Default overall timeout of a batch of requests
+DEFAULT_REQUEST_TIMEOUT = 1
+
 COMMAND_BONJOUR = 'BONJOUR'
 COMMAND_IS_INIT = 'ISINIT'
 COMMAND_INIT = 'INIT'
@@ -56,33 +85,106 @@ class CommandManager(object):
 
         devices_dict: Dictionary containing the list of devices.
 
-        init_timeout: Initialisation timeout, default set to DEFAULT_INIT_TIMEOUT (1).
+        init_timeout: Longest interval between two init probes, default set to DEFAULT_INIT_TIMEOUT (1).
+
+        init_n_repeats: The boards have init_timeout * init_n_repeats to reply to the init probes,
+            default set to DEFAULT_INIT_N_REPEATS (5).
 
-        init_n_repeats: Number of times to attempt initialisation, default set to DEFAULT_INIT_N_REPEATS (5).
+        simulation: Replaces handlers and devices with virtual ones, default set to False.
+
+        use_reactor: Reads all handlers from a single CommandReactor thread instead of one thread each,
+            default set to False.
+
+        discovery_cache: Path of a file remembering where devices were found. On the next start with the
+            same configuration, each device is only confirmed on its cached handler, default set to None.
+
+        lazy: Registers each device on its first access, as an attribute or from devices[name], rather than
+            all of them at start, default set to False.
+
+        prefetch: In lazy mode, registers the devices not accessed yet from a background thread,
+            default set to False.
+
+    The timeline of the start is kept in startup_trace, see StartupTrace, and its report is logged at debug level.
     """
     def __init__(self, command_configs: List[Dict], devices_dict: Dict, init_timeout: float = DEFAULT_INIT_TIMEOUT,
-                 init_n_repeats: int = DEFAULT_INIT_N_REPEATS, simulation: bool = False):
+                 init_n_repeats: int = DEFAULT_INIT_N_REPEATS, simulation: bool = False, use_reactor: bool = False,
+                 discovery_cache: Optional[str] = None, lazy: bool = False, prefetch: bool = False):
         self.logger = logging.getLogger(__name__).getChild(self.__class__.__name__)
+        self.startup_trace = StartupTrace()
 
         self._simulation = simulation
 
+        self.discovery_cache = discovery_cache
+        self.config_hash = hashlib.sha1(json.dumps({"ios": command_configs, "devices": devices_dict},
+                                                   sort_keys=True, default=str).encode()).hexdigest()
+
+        self.reactor: Optional[CommandReactor] = None
+        if use_reactor and not self._simulation:
+            self.reactor = CommandReactor()
+            self.reactor.start()
+
         self.initialised = False
         self.init_n_repeats = init_n_repeats
-        self.init_lock = Lock(init_timeout)
+        self.init_timeout = init_timeout
+        # Time from the port opening to the init reply per handler name, kept in the discovery cache
+        self.boot_latencies: Dict[str, float] = dict(self.load_discovery_cache().get("boot_latency", {}))
 
         self.commandhandlers: List[GenericCommandHandler] = []
+        # Handlers per ios entry index and name, None for the entries that did not initialise
+        self.ios: Dict[Union[int, str], Optional[GenericCommandHandler]] = {}
+        self._n_ios = 0
         if not self._simulation:
-            for config_entry in command_configs:
-                # Create handler from config & initialize device
-                self.add_command_handler(config_entry)
+            # Create handlers from config & initialize devices, all at once
+            start_time = time.monotonic()
+            self.add_command_handlers(command_configs)
+            self.startup_trace.record_phase("handlers", time.monotonic() - start_time)
         else:
             self.logger.info("Simulation mode, skipping handlers creation.")
             self.commandhandlers = command_configs  # type: ignore
 
-        self.devices: Dict[str, Any] = {}
-        self.register_all_devices(devices_dict)
-        self.set_devices_as_attributes()
+        self.devices: Dict[str, Any] = LazyDevices(self) if lazy else {}
+        # Bonjour detection time per device name
+        self.discovery_times: Dict[str, float] = {}
+        # Devices per handler, and handler per device name (None for virtual devices)
+        self.handler_devices: Dict[GenericCommandHandler, Dict[str, Any]] = {}
+        self.device_handlers: Dict[str, Optional[GenericCommandHandler]] = {}
+        # Configuration of the devices not registered yet, in lazy mode
+        self.lazy_devices: Dict[str, Dict] = {}
+        self._lazy_lock = threading.RLock()
+        self.prefetch_thread: Optional[threading.Thread] = None
+        if lazy:
+            self.lazy_devices.update(devices_dict)
+            if not self._simulation:
+                self.save_discovery_cache({}, merge=True)  # boot latencies, the devices are added on registration
+            if prefetch:
+                self.prefetch_thread = threading.Thread(target=self.prefetch_devices, name="DevicePrefetch",
+                                                        daemon=True)
+                self.prefetch_thread.start()
+        else:
+            self.register_all_devices(devices_dict)
+            self.set_devices_as_attributes()
         self.initialised = True
+        self.startup_trace.finish()
+        self.logger.debug(self.startup_trace.report())
+
+    def add_command_handlers(self, handler_configs: List[Dict]) -> None:
+        """Creates command handlers from their configuration dictionaries, tests their connections
+        concurrently and appends the instances to self.commandhandlers, in configuration order.
+
+        Args:
+            handler_configs: Handler configuration dictionaries.
+        """
+        if self._simulation:
+            for handler_config in handler_configs:
+                self.add_command_handler(handler_config)
+            return
+        if not handler_configs:
+            return
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(handler_configs)) as executor:
+            handlers = list(executor.map(self.open_command_handler, handler_configs))
+        for handler_config, handler in zip(handler_configs, handlers):
+            self.record_io(handler_config, handler)
+        self.commandhandlers.extend(handler for handler in handlers if handler is not None)
 
     def add_command_handler(self, handler_config: Dict) -> None:
         """Creates command handler from the configuration dictionary, tests connection
@@ -95,6 +197,54 @@ class CommandManager(object):
             self.logger.info("Simulation mode, skipping handlers addition.")
             self.commandhandlers.append(handler_config)  # type: ignore
             return None
+        handler = self.open_command_handler(handler_config)
+        self.record_io(handler_config, handler)
+        if handler is not None:
+            self.commandhandlers.append(handler)
+
+    def record_io(self, handler_config: Dict, handler: Optional[GenericCommandHandler]) -> None:
+        """
+        Records the handler of an ios entry under its index and optional name, for devices pinned to it.
+
+        Args:
+            handler_config: Handler configuration dictionary.
+
+            handler: The handler created from it, None if it did not initialise.
+        """
+        self.ios[self._n_ios] = handler
+        self._n_ios += 1
+        if "name" in handler_config:
+            self.ios[handler_config["name"]] = handler
+
+    def get_io_handler(self, io: Union[int, str]) -> Optional[GenericCommandHandler]:
+        """
+        Gets the handler of an ios entry.
+
+        Args:
+            io: Index or name of the ios entry.
+
+        Returns:
+            The handler, None if it did not initialise.
+
+        Raises:
+            CMDeviceConfigurationError: No such ios entry.
+        """
+        if isinstance(io, bool) or not isinstance(io, (int, str)) or io not in self.ios:
+            raise CMDeviceConfigurationError(f"Invalid 'io' {io!r}, it must be the index or name of an ios entry!")
+        return self.ios[io]
+
+    def open_command_handler(self, handler_config: Dict) -> Optional[GenericCommandHandler]:
+        """Creates command handler from the configuration dictionary, starts it and waits for the board to init.
+
+        Args:
+            handler_config: Handler configuration dictionary.
+
+        Returns:
+            The initialised handler, None if it could not be opened or did not initialise.
+
+        Raises:
+            CMHandlerConfigurationError: A required handler could not be opened.
+        """
         # Make a copy not to mutate original dict - might be re-used
         # by upper-level code for object re-creation.
         handler_config = handler_config.copy()
@@ -112,7 +262,12 @@ class CommandManager(object):
         # Check if handler is required & remove the key from dict
         required = handler_config.get("required", False)
         handler_config.pop("required", None)
+        # Name only used by the devices pinned to this handler, see record_io
+        handler_config.pop("name", None)
+        # The board is known to be running already, e.g. opened with "dtr": false, so it is probed right away
+        running = handler_config.pop("running", False)
 
+        start_time = time.monotonic()
         try:
             if handler_type == "serial":
                 handler = SerialCommandHandler.from_config(handler_config)
@@ -121,6 +276,7 @@ class CommandManager(object):
                 handler = TCPIPCommandHandler.from_config(handler_config)
                 self.logger.info("Created socket-based command handler for %s.", device_name)
         except CMHandlerConfigurationError as e:
+            self.startup_trace.record_handler(device_name, open=time.monotonic() - start_time, initialised=False)
             if required:
                 raise CMHandlerConfigurationError(f"Error initializing device {device_name}: {e}") from None
             else:
@@ -129,28 +285,43 @@ class CommandManager(object):
         else:
             # If CommandHandler creation succeeded, add callback, start handler and initialize it
             assert isinstance(handler, (SerialCommandHandler, TCPIPCommandHandler))
+            open_time = time.monotonic()
+            self.startup_trace.record_handler(handler.name, open=open_time - start_time, initialised=False)
             handler.add_default_handler(self.unrecognized)
-            handler.start()
+            self.start_handler(handler)
             try:
-                elapsed = self.wait_device_for_init(handler)
+                elapsed = self.wait_device_for_init(handler, running)
                 self.logger.info(f"Found Arduino CommandManager at {device_name}, init time was {elapsed:.3} seconds")
             except CMHandlerDiscoveryTimeout:
                 self.logger.warning(f"Arduino CommandManager at {device_name} has not initialized")
             else:
-                # Update handlers list
-                self.commandhandlers.append(handler)
+                self.startup_trace.record_handler(handler.name, initialised=True)
+                return handler
+            finally:
+                if handler.first_byte_time is not None:
+                    self.startup_trace.record_handler(handler.name, first_byte=handler.first_byte_time - open_time)
+        return None
+
+    def start_handler(self, handler: GenericCommandHandler) -> None:
+        """
+        Starts reading the incoming data of a handler, either from the reactor or from the handler's own thread.
+
+        Args:
+            handler: The handler to start.
+        """
+        if self.reactor is not None:
+            try:
+                self.reactor.register(handler)
+                return
+            except CMHandlerConfigurationError as e:
+                self.logger.warning("Falling back to a reader thread: %s", e)
+        handler.start()
 
     def remove_command_handler(self, handler_to_remove: GenericCommandHandler) -> None:
         """
         Deletes the command handler object & removes a reference to it from
-        class dictionary. Then deletes the devices bound to the handler being deleted.
-
-        The method to detect which devices depend on the handler being deleted
-        may seem wanky because it is.
-        However, it is the only possible method as every device internal
-        CommandHandler doesn't hold a reference to an actual command handler.
-        The only thing having this reference is the device's write() function
-        which gets updated on create_and_setup_device()
+        class dictionary. Then deletes the devices bound to the handler being deleted,
+        found in the index of the devices per handler.
         """
         if self._simulation:
             self.logger.info("Simulation mode, skipping handlers removal.")
@@ -159,12 +330,13 @@ class CommandManager(object):
             self.logger.warning("Command handler %s not found!", handler_to_remove)
             return
         self.logger.info("Removing devices...")
-        # Find the dependent devices to remove (i.e. the devices using that handler)
-        for name, dev in self.devices.copy().items():
-            # write.__self__ is the CommandHandler instance owning the write function set to CommandDevice.write
-            if handler_to_remove is dev.write.__self__:  # type: ignore
-                self.logger.info("Removing dependent device %s", name)
-                self.unregister_device(name)
+        for name in list(self.handler_devices.get(handler_to_remove, {})):
+            self.logger.info("Removing dependent device %s", name)
+            self.unregister_device(name)
+        self.handler_devices.pop(handler_to_remove, None)
+        for io, handler in self.ios.items():
+            if handler is handler_to_remove:
+                self.ios[io] = None
         # Remove handler
         self.logger.info("Removing command handler...")
         self.commandhandlers.remove(handler_to_remove)
@@ -174,22 +346,121 @@ class CommandManager(object):
         Sets the list of devices as attributes.
         """
         for device_name, device in list(self.devices.items()):
-            if hasattr(self, device_name):
-                self.logger.warning(f"Device named {device_name} is already a reserved attribute! "
-                                    f"Please change name or do not use this device in attribute mode, "
-                                    f"rather use devices[{device_name}]")
-            else:
-                setattr(self, device_name, device)
+            self.set_device_as_attribute(device_name, device)
 
-    def handle_init(self, *arg) -> None:
+    def set_device_as_attribute(self, device_name: str, device: Any) -> None:
         """
-        Handles the initialisation of the Manager, ensuring that the threading locks are released.
+        Sets a device as attribute, unless the name is already taken.
 
         Args:
+            device_name: Name of the device.
+
+            device: The device.
+        """
+        if hasattr(self, device_name):
+            self.logger.warning(f"Device named {device_name} is already a reserved attribute! "
+                                f"Please change name or do not use this device in attribute mode, "
+                                f"rather use devices[{device_name}]")
+        else:
+            setattr(self, device_name, device)
+
+    def __getattr__(self, name: str) -> Any:
+        """
+        Registers a device of the lazy mode on its first access as an attribute.
+        Only called when no attribute of that name exists.
+
+        Args:
+            name: Name of the attribute.
+
+        Raises:
+            AttributeError: No attribute nor device of that name.
+        """
+        lazy_devices = self.__dict__.get("lazy_devices")
+        if lazy_devices and name in lazy_devices:
+            return self.register_lazy_device(name)
+        raise AttributeError(f"'{self.__class__.__name__}' object has no attribute '{name}'")
+
+    def register_lazy_device(self, device_name: str,
+                             detection: Optional[Tuple[GenericCommandHandler, str, float]] = None) -> Any:
+        """
+        Registers a device of the lazy mode, unless it is already registered.
+
+        Args:
+            device_name: Name of the device.
+
+            detection: The (handler, bonjour_id, elapsed) found by a previous bonjour scan,
+                default set to None (look for the device now, like at a full start:
+                on its pinned handler, on its cached handler, or on all handlers).
+
+        Returns:
+            The registered device.
+
+        Raises:
+            KeyError: No device of that name.
+
+            CMDeviceDiscoveryTimeout: Device has not been found.
+
+            CMDeviceConfigurationError: Invalid device configuration.
+        """
+        with self._lazy_lock:
+            if dict.__contains__(self.devices, device_name):
+                return dict.__getitem__(self.devices, device_name)
+            device_info = self.lazy_devices[device_name]
+            if detection is None and not self._simulation:
+                # Pinned, cached or probed on all handlers, like at a full start
+                detections = self.detect_all_devices({device_name: device_info})
+                command_id = device_info.get('command_id', "")
+                if command_id and command_id not in detections:
+                    if "io" in device_info:
+                        self.get_io_handler(device_info["io"])  # raises on an invalid reference
+                    raise CMDeviceDiscoveryTimeout(f"Device '{device_name}' (ID=<{command_id}>) has not been found!")
+                detection = detections.get(command_id)
+                self.save_discovery_cache(detections, merge=True)
+            self.register_device(device_name, device_info, detection)
+            del self.lazy_devices[device_name]
+            device = self.devices[device_name]
+            self.set_device_as_attribute(device_name, device)
+            return device
+
+    def prefetch_devices(self) -> None:
+        """
+        Discovers all the devices of the lazy mode not registered yet at once, then registers them one by one.
+        The errors are logged, the devices that failed are looked for again on their first access.
+        """
+        devices_dict = dict(self.lazy_devices)
+        try:
+            detections = self.detect_all_devices(devices_dict)
+        except CMError as e:
+            self.logger.error("Device prefetch failed: %s", e)
+            return
+        if not self._simulation:
+            with self._lazy_lock:
+                self.save_discovery_cache(detections, merge=True)
+        for device_name, device_info in devices_dict.items():
+            detection = detections.get(device_info.get('command_id', ""))
+            if detection is None and not self._simulation:
+                self.logger.warning("Device '%s' not found by the prefetch", device_name)
+                continue
+            try:
+                self.register_lazy_device(device_name, detection)
+            except (KeyError, CMError) as e:
+                self.logger.error("Device '%s' prefetch failed: %s", device_name, e)
+        self.logger.debug("Device prefetch done")
+
+    def handle_init(self, init_done: threading.Event, wakeup: threading.Event, *arg) -> None:
+        """
+        Handles the initialisation of the Manager, waking up the thread waiting for it.
+
+        Args:
+            init_done: Set when the handler is initialised.
+
+            wakeup: Set to wake the waiting thread up.
+
             *arg: Variable argument.
         """
         if arg[0] and bool(int(arg[0])):
-            self.init_lock.ensure_released()
+            init_done.set()
+            wakeup.set()
 
     def request_init(self, handler: GenericCommandHandler) -> None:
         """
@@ -201,34 +472,78 @@ class CommandManager(object):
         """
         handler.send(COMMAND_IS_INIT)
 
-    def request_and_wait_for_init(self, handler: GenericCommandHandler) -> Tuple[bool, float]:
+    def request_and_wait_for_init(self, handler: GenericCommandHandler, init_done: threading.Event,
+                                  wakeup: threading.Event, running: bool = False) -> Tuple[bool, float]:
         """
-        Requests initialisation and waits until it obtains a threading lock.
+        Probes the board until it is initialised or the init deadline, init_timeout * init_n_repeats, is reached.
+
+        The first probe is sent right away, or shortly before the boot latency recorded for the handler
+        on a previous start, not to disturb the bootloader of a resetting board. The following probes are
+        sent at intervals doubling from DEFAULT_INIT_PROBE_INTERVAL up to init_timeout, and as soon as the
+        first bytes arrive from the board, which has then just booted.
 
         Args:
             handler: Command Handler object for communication.
 
-        """
-        start_time = time.time()
+            init_done: Set when the handler replies.
 
-        self.init_lock.acquire()
-        for _ in range(self.init_n_repeats):
-            self.request_init(handler)
-            is_init, _ = self.init_lock.wait_until_released()
-            if is_init:
-                break
-        self.init_lock.ensure_released()
+            wakeup: Set when the handler replies or receives its first data.
+
+            running: The board is already running, so the first probe is sent right away, default set to False.
+
+        Returns:
+            is_init: Whether the board replied.
+
+            elapsed: Time waited.
 
-        elapsed = time.time() - start_time
+        """
+        start_time = time.monotonic()
+        deadline = start_time + self.init_timeout * self.init_n_repeats
+        data_seen = handler.first_byte_time is not None
+        boot_latency = self.boot_latencies.get(handler.name)
+        probe_time = start_time
+        if boot_latency and not data_seen and not running:
+            probe_time += BOOT_LATENCY_MARGIN * boot_latency
+        interval = DEFAULT_INIT_PROBE_INTERVAL
+        n_requests = 0
+        last_probe = start_time
+
+        while not init_done.is_set():
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            if now >= probe_time:
+                self.request_init(handler)
+                n_requests += 1
+                last_probe = now
+                probe_time = now + interval
+                interval = min(2 * interval, self.init_timeout)
+            wakeup.wait(min(probe_time, deadline) - now)
+            wakeup.clear()
+            if not data_seen and handler.first_byte_time is not None:
+                # The board has just booted, probe it now
+                data_seen = True
+                probe_time = time.monotonic()
+                interval = DEFAULT_INIT_PROBE_INTERVAL
+
+        is_init = init_done.is_set()
+        elapsed = time.monotonic() - start_time
+        self.startup_trace.record_handler(handler.name, init=elapsed, init_requests=n_requests,
+                                          init_round_trip=time.monotonic() - last_probe if is_init else None)
+        if is_init and not running:
+            self.boot_latencies[handler.name] = elapsed
         return is_init, elapsed
 
-    def wait_device_for_init(self, handler: GenericCommandHandler) -> float:
+    def wait_device_for_init(self, handler: GenericCommandHandler, running: bool = False) -> float:
         """
         Waits for initialisation using communication link.
 
         Args:
             handler: Command Handler object to add/remove commands.
 
+            running: The board is already running, it is probed right away whatever its recorded boot latency,
+                default set to False.
+
         Returns:
             elapsed: Time waited for initialisation.
 
@@ -238,12 +553,19 @@ class CommandManager(object):
         """
         self.logger.debug('Waiting for device at %s to init...', handler.name)
 
-        handler.add_command(COMMAND_INIT, self.handle_init)
+        # Each handler has its own init state, so that they can be initialised concurrently
+        init_done = threading.Event()
+        wakeup = threading.Event()
+        handle_init = functools.partial(self.handle_init, init_done, wakeup)
+        handler.add_command(COMMAND_INIT, handle_init)
+        handler.on_first_data = wakeup.set
         try:
-            is_init, elapsed = self.request_and_wait_for_init(handler)
+            is_init, elapsed = self.request_and_wait_for_init(handler, init_done, wakeup, running)
         except CMCommunicationError:
             raise CMHandlerDiscoveryTimeout(handler.name)
-        handler.remove_command(COMMAND_INIT, self.handle_init)
+        finally:
+            handler.on_first_data = None
+        handler.remove_command(COMMAND_INIT, handle_init)
         if is_init:
             return elapsed
         raise CMHandlerDiscoveryTimeout(handler.name)
@@ -252,17 +574,181 @@ class CommandManager(object):
         """
         Registers all available Arduino devices.
 
+        Devices pinned to an ios entry are only looked for on its handler, or not at all when their
+        bonjour_id is given. All other devices are looked for at once on all handlers.
+        The devices found are then created one by one and initialised concurrently.
+
         Args:
             devices_dict: Dictionary containing all devices.
 
         """
+        start_time = time.monotonic()
+        detections = self.detect_all_devices(devices_dict)
+        if not self._simulation:
+            self.startup_trace.record_phase("discovery", time.monotonic() - start_time)
+
+        start_time = time.monotonic()
+        devices: Dict[str, Tuple[Any, Optional[GenericCommandHandler]]] = {}
         for device_name, device_info in devices_dict.items():
+            command_id = device_info.get('command_id', "")
             try:
-                self.register_device(device_name, device_info)
+                if not self._simulation and command_id and command_id not in detections:
+                    if "io" in device_info:
+                        self.get_io_handler(device_info["io"])  # raises on an invalid reference
+                    raise CMDeviceDiscoveryTimeout(f"Device '{device_name}' (ID=<{command_id}>) has not been found!")
+                devices[device_name] = self.create_device(device_name, device_info, detections.get(command_id))
             except CMDeviceConfigurationError as e:
                 self.logger.error(e)
+        self.init_devices(devices)
+        self.startup_trace.record_phase("devices", time.monotonic() - start_time)
+        if not self._simulation:
+            self.save_discovery_cache(detections)
+
+    def detect_all_devices(self, devices_dict: Dict) -> Dict[str, Tuple[GenericCommandHandler, str, float]]:
+        """
+        Looks for devices at once: pinned devices on their handler, cached devices on their cached handler,
+        then all other devices on all handlers.
+
+        Args:
+            devices_dict: Dictionary containing the devices.
+
+        Returns:
+            (handler, bonjour_id, elapsed) per command id, devices not found are missing.
+        """
+        detections: Dict[str, Tuple[GenericCommandHandler, str, float]] = {}
+        if not self._simulation:
+            bonjour_service = CommandBonjour(self.commandhandlers)
+            pinned = {device_name: device_info for device_name, device_info in devices_dict.items()
+                      if "io" in device_info}
+            detections = self.detect_pinned_devices(bonjour_service, pinned)
+            command_ids = [device_info.get('command_id', "") for device_name, device_info in devices_dict.items()
+                           if device_name not in pinned]
+            command_ids = [command_id for command_id in command_ids if command_id]
+            detections.update(self.confirm_cached_devices(bonjour_service, command_ids))
+            missing = [command_id for command_id in command_ids if command_id not in detections]
+            if missing:
+                detections.update(bonjour_service.detect_devices(missing))
+        return detections
+
+    def detect_pinned_devices(self, bonjour_service: 'CommandBonjour',
+                              devices_dict: Dict) -> Dict[str, Tuple[GenericCommandHandler, str, float]]:
+        """
+        Detects the devices pinned to an ios entry with their "io" field.
+
+        A device whose "bonjour_id" is given is not probed at all, unless its "validate" field is true.
+        Otherwise a single probe is sent to its handler.
+
+        Args:
+            bonjour_service: The bonjour service of the manager handlers.
+
+            devices_dict: Dictionary containing the pinned devices.
+
+        Returns:
+            (handler, bonjour_id, elapsed) per command id, devices not found or invalid are missing.
+        """
+        detections: Dict[str, Tuple[GenericCommandHandler, str, float]] = {}
+        candidates: Dict[str, List[GenericCommandHandler]] = {}
+        for device_name, device_info in devices_dict.items():
+            command_id = device_info.get('command_id', "")
+            try:
+                handler = self.get_io_handler(device_info["io"])
+            except CMDeviceConfigurationError:
+                continue  # reported when the device is registered
+            if not command_id or handler is None:
+                continue
+            if device_info.get("bonjour_id") and not device_info.get("validate", False):
+                detections[command_id] = (handler, device_info["bonjour_id"], 0.0)
+            else:
+                candidates[command_id] = [handler]
+        if candidates:
+            probed = bonjour_service.detect_devices(list(candidates), candidates=candidates)
+            for device_name, device_info in devices_dict.items():
+                command_id = device_info.get('command_id', "")
+                expected = device_info.get("bonjour_id")
+                if command_id in probed and expected and probed[command_id][1] != expected:
+                    self.logger.warning(f"Device '{device_name}' (ID=<{command_id}>) is a <{probed[command_id][1]}>, "
+                                        f"not a <{expected}> as configured!")
+            detections.update(probed)
+        return detections
+
+    def load_discovery_cache(self) -> Dict[str, Any]:
+        """
+        Loads the entry of the discovery cache file matching the current configuration.
+
+        Returns:
+            The cached data, empty if there is no cache or it was made for another configuration.
+        """
+        if self.discovery_cache is None:
+            return {}
+        try:
+            with open(self.discovery_cache) as f:
+                cache = json.load(f)
+            return dict(cache.get(self.config_hash, {}))
+        except (OSError, ValueError, AttributeError) as e:
+            self.logger.debug("Discovery cache %s not loaded: %s", self.discovery_cache, e)
+            return {}
+
+    def save_discovery_cache(self, detections: Dict[str, Tuple[GenericCommandHandler, str, float]],
+                             merge: bool = False) -> None:
+        """
+        Saves where devices were found, and the boot latencies, under the hash of the current configuration.
 
-    def register_device(self, device_name: str, device_info: Dict) -> None:
+        Args:
+            detections: (handler, bonjour_id, elapsed) per command id.
+
+            merge: Keeps the cached devices missing from detections, e.g. the devices of the lazy mode
+                not registered yet, default set to False (replace them).
+        """
+        if self.discovery_cache is None:
+            return
+        entry = self.load_discovery_cache()
+        devices = dict(entry.get("devices", {})) if merge else {}
+        devices.update({command_id: {"handler": handler.name, "bonjour_id": bonjour_id}
+                        for command_id, (handler, bonjour_id, _) in detections.items()})
+        entry["devices"] = devices
+        entry["boot_latency"] = self.boot_latencies
+        try:
+            try:
+                with open(self.discovery_cache) as f:
+                    cache = json.load(f)
+                if not isinstance(cache, dict):
+                    cache = {}
+            except (OSError, ValueError):
+                cache = {}
+            cache[self.config_hash] = entry
+            with open(self.discovery_cache, "w") as f:
+                json.dump(cache, f, indent=2)
+        except OSError as e:
+            self.logger.warning("Cannot write discovery cache %s: %s", self.discovery_cache, e)
+
+    def confirm_cached_devices(self, bonjour_service: 'CommandBonjour',
+                               command_ids: List[str]) -> Dict[str, Tuple[GenericCommandHandler, str, float]]:
+        """
+        Confirms the devices of the discovery cache with a single probe on their cached handler.
+
+        Args:
+            bonjour_service: The bonjour service of the manager handlers.
+
+            command_ids: The IDs of the devices to look for.
+
+        Returns:
+            (handler, bonjour_id, elapsed) per command id, for the devices confirmed where the cache expected them.
+        """
+        cached_devices = self.load_discovery_cache().get("devices", {})
+        handlers = {handler.name: handler for handler in self.commandhandlers}
+        candidates = {command_id: [handlers[cached_devices[command_id]["handler"]]]
+                      for command_id in command_ids
+                      if command_id in cached_devices and cached_devices[command_id].get("handler") in handlers}
+        if not candidates:
+            return {}
+        detections = bonjour_service.detect_devices(list(candidates), n_rounds=1, candidates=candidates)
+        confirmed = {command_id: detection for command_id, detection in detections.items()
+                     if detection[1] == cached_devices[command_id].get("bonjour_id")}
+        self.logger.info("Discovery cache confirmed %d of %d devices", len(confirmed), len(command_ids))
+        return confirmed
+
+    def register_device(self, device_name: str, device_info: Dict,
+                        detection: Optional[Tuple[GenericCommandHandler, str, float]] = None) -> None:
         """
         Registers an individual Arduino device.
 
@@ -271,10 +757,123 @@ class CommandManager(object):
 
             device_info: Dictionary containing the device information.
 
+            detection: The (handler, bonjour_id, elapsed) found by a previous bonjour scan,
+                default set to None (look for the device on all handlers).
+
+        Raises:
+            CMDeviceConfigurationError: Invalid device configuration.
+
+            CMDeviceDiscoveryTimeout: Device has not been found.
+
+        """
+        device, handler = self.create_device(device_name, device_info, detection)
+        self.init_device(device_name, device)
+        self.add_device(device_name, device, handler)
+
+    def add_device(self, device_name: str, device: Any, handler: Optional[GenericCommandHandler]) -> None:
+        """
+        Adds a device to self.devices and to the index of the devices per handler.
+
+        Args:
+            device_name: Name of the device.
+
+            device: The device.
+
+            handler: The handler the device is connected to, None for virtual devices.
+        """
+        self.devices[device_name] = device
+        self.device_handlers[device_name] = handler
+        if handler is not None:
+            self.handler_devices.setdefault(handler, {})[device_name] = device
+
+    def get_handler_devices(self, handler: GenericCommandHandler) -> Dict[str, Any]:
+        """
+        Gets the devices connected to a handler.
+
+        Args:
+            handler: The handler.
+
+        Returns:
+            The devices per device name, a copy.
+        """
+        return dict(self.handler_devices.get(handler, {}))
+
+    def init_devices(self, devices: Dict[str, Tuple[Any, Optional[GenericCommandHandler]]]) -> None:
+        """
+        Initialises devices concurrently, one thread each, then adds them to self.devices.
+
+        The init() of some devices waits for a long time (sensor stabilisation, motors homing),
+        these waits overlap. The handlers serialise the writes, and every device has its own
+        command id, so the replies reach the right device whatever the order.
+        Devices whose init() fails with a configuration error are logged and left out.
+
+        Args:
+            devices: The created (device, handler), per device name.
+
         Raises:
-            CMDeviceRegisterError: Device is not in the device register.
+            Exception: Error of the first device, in order, whose init() failed otherwise, once all are done.
 
-            CMBonjourError: Device has not been found.
+        """
+        if len(devices) <= 1 or self._simulation:
+            for device_name, (device, handler) in devices.items():
+                self.init_device(device_name, device)
+                self.add_device(device_name, device, handler)
+            return
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(devices),
+                                                   thread_name_prefix="DeviceInit") as executor:
+            futures = {device_name: executor.submit(self.init_device, device_name, device)
+                       for device_name, (device, _) in devices.items()}
+        error: Optional[BaseException] = None
+        for device_name, future in futures.items():
+            exception = future.exception()
+            if exception is None:
+                self.add_device(device_name, *devices[device_name])
+            elif isinstance(exception, CMDeviceConfigurationError):
+                self.logger.error(exception)
+            elif error is None:
+                error = exception
+        if error is not None:
+            raise error
+
+    def init_device(self, device_name: str, device: Any) -> None:
+        """
+        Initialises a device created by create_device, virtual devices need no initialisation.
+
+        Args:
+            device_name: Name of the device.
+
+            device: The device.
+
+        """
+        if self._simulation:
+            return
+        start_time = time.monotonic()
+        device.init()
+        self.startup_trace.record_device(device_name, init=time.monotonic() - start_time)
+
+    def create_device(self, device_name: str, device_info: Dict,
+                      detection: Optional[Tuple[GenericCommandHandler, str, float]] = None
+                      ) -> Tuple[Any, Optional[GenericCommandHandler]]:
+        """
+        Creates an individual Arduino device, without initialising it.
+
+        Args:
+            device_name: Name of the device.
+
+            device_info: Dictionary containing the device information.
+
+            detection: The (handler, bonjour_id, elapsed) found by a previous bonjour scan,
+                default set to None (look for the device on all handlers).
+
+        Returns:
+            device: The device, a VirtualDevice in simulation mode.
+
+            handler: The handler the device is connected to, None in simulation mode.
+
+        Raises:
+            CMDeviceConfigurationError: Invalid device configuration.
+
+            CMDeviceDiscoveryTimeout: Device has not been found.
 
         """
 
@@ -287,36 +886,122 @@ class CommandManager(object):
         device_config = device_info.get("config", {})
 
         if not self._simulation:
-            # Look for device via bonjour on all handlers
-            try:
+            # Look for device via bonjour on its handler if pinned, otherwise on all handlers
+            if detection is None:
                 bonjour_service = CommandBonjour(self.commandhandlers)
-                handler, bonjour_id, elapsed = bonjour_service.detect_device(command_id)
-                self.logger.debug(f"Device '{device_name}' (ID=<{command_id}> type=<{bonjour_id}>) found on {handler.name}")
-            except CMBonjourTimeout:
-                raise CMDeviceDiscoveryTimeout(f"Device '{device_name}' (ID=<{command_id}>) has not been found!") from None
+                if "io" in device_info:
+                    self.get_io_handler(device_info["io"])  # raises on an invalid reference
+                    detection = self.detect_pinned_devices(bonjour_service, {device_name: device_info}).get(command_id)
+                else:
+                    detection = bonjour_service.detect_devices([command_id]).get(command_id)
+                if detection is None:
+                    raise CMDeviceDiscoveryTimeout(f"Device '{device_name}' (ID=<{command_id}>) has not been found!")
+            handler, bonjour_id, elapsed = detection
+            self.discovery_times[device_name] = elapsed
+            self.logger.debug(f"Device '{device_name}' (ID=<{command_id}> type=<{bonjour_id}>) found on {handler.name}")
+
+            self.startup_trace.record_device(device_name, command_id=command_id, handler=handler.name,
+                                             bonjour_id=bonjour_id, discovery=elapsed)
 
-            # Initialise device
             try:
-                device = create_and_setup_device(handler, command_id, bonjour_id, device_config)
+                device = create_and_setup_device(handler, command_id, bonjour_id, device_config, init=False)
                 self.logger.debug(f"Device '{device_name}' created! (ID=<{command_id}> type=<{bonjour_id}> handler="
                                  f"<{handler.name}> detection time {elapsed:.3f} s)")
             except CMDeviceRegisterError:
-                device = create_and_setup_device(handler, command_id, DEFAULT_REGISTER, device_config)
+                device = create_and_setup_device(handler, command_id, DEFAULT_REGISTER, device_config, init=False)
                 self.logger.warning(f"Device '{device_name}' NOT found in the register! Initialized as blank minimal object"
                                     f"! (ID=<{command_id}> type=<{bonjour_id}> handler=<{handler.name}>)")
-            self.devices[device_name] = device
-        else:
-            device = VirtualDevice(device_name, device_config)
-            self.devices[device_name] = device
+            return device, handler
+        return VirtualDevice(device_name, device_config), None
 
     def unregister_device(self, device_name: str) -> None:
         """
-        Removes device attribute & reference from devices dictionary
+        Removes device attribute & reference from devices dictionary and from the index of the devices per handler
         """
         # Remove device attribute from self
         delattr(self, device_name)
         # Remove reference from device list
         self.devices.pop(device_name)
+        handler = self.device_handlers.pop(device_name, None)
+        if handler is not None:
+            handler_devices = self.handler_devices.get(handler, {})
+            handler_devices.pop(device_name, None)
+            if not handler_devices:
+                self.handler_devices.pop(handler, None)
+
+    def get_many(self, requests: Dict[str, List[str]],
+                  timeout: float = DEFAULT_REQUEST_TIMEOUT) -> Dict[str, Dict[str, Any]]:
+        """
+        Reads many variables across devices and handlers at once.
+
+        All requests are sent up front, then all answers are awaited together, so the whole batch
+        takes about one round trip. As the bonjour probes, the requests to a handler are written in
+        chunks of DEFAULT_PROBE_WRITE_SIZE bytes at most, each sent once the answers to the previous
+        one arrived, or after DEFAULT_PROBE_WRITE_INTERVAL.
+
+        Args:
+            requests: Names of the variables to read per device name,
+                e.g. {"bme": ["temperature", "humidity"], "dallas1": ["celsius"]}
+
+            timeout: Overall time to wait for all answers, default set to DEFAULT_REQUEST_TIMEOUT (1).
+
+        Returns:
+            The values read, per device name and variable name.
+
+        Raises:
+            CMDeviceConfigurationError: Unknown device or variable.
+
+            CMDeviceReplyTimeout: A device did not answer in time.
+
+        """
+        if self._simulation:
+            return {device_name: {variable: getattr(self.devices[device_name], 'get_' + variable)()
+                                  for variable in variables}
+                    for device_name, variables in requests.items()}
+
+        start_time = time.monotonic()
+        futures: List[Tuple[str, str, concurrent.futures.Future]] = []
+        commands: Dict[Callable, List[Tuple[bytes, concurrent.futures.Future]]] = {}  # per device write function
+        try:
+            for device_name, variables in requests.items():
+                try:
+                    device = self.devices[device_name]  # registers the devices of the lazy mode
+                except KeyError:
+                    raise CMDeviceConfigurationError(f"Unknown device '{device_name}'!") from None
+                for variable in variables:
+                    future, command = device.prepare_request(variable)
+                    futures.append((device_name, variable, future))
+                    commands.setdefault(device.write, []).append((command, future))
+            # Chunks per write function, i.e. per handler, as the requests and the futures of their answers
+            chunks: Dict[Callable, List[Tuple[bytes, List[concurrent.futures.Future]]]] = {}
+            for write, handler_commands in commands.items():
+                start = 0
+                chunks[write] = []
+                for chunk, count in chunk_commands([command for command, _ in handler_commands]):
+                    chunks[write].append((chunk, [future for _, future in handler_commands[start:start + count]]))
+                    start += count
+            for i in range(max((len(handler_chunks) for handler_chunks in chunks.values()), default=0)):
+                written: List[concurrent.futures.Future] = []
+                for write, handler_chunks in chunks.items():
+                    if i < len(handler_chunks):
+                        write(handler_chunks[i][0])
+                        written.extend(handler_chunks[i][1])
+                if any(i + 1 < len(handler_chunks) for handler_chunks in chunks.values()):
+                    concurrent.futures.wait(written, DEFAULT_PROBE_WRITE_INTERVAL)
+        except Exception:
+            for _, _, future in futures:
+                future.cancel()
+            raise
+
+        _, not_done = concurrent.futures.wait([future for _, _, future in futures], timeout)
+        values: Dict[str, Dict[str, Any]] = {device_name: {} for device_name in requests}
+        for device_name, variable, future in futures:
+            if future in not_done:
+                for _, _, other_future in futures:
+                    other_future.cancel()
+                raise CMDeviceReplyTimeout(device_name, variable, time.monotonic() - start_time)
+            values[device_name][variable] = future.result()
+        return values
 
     @classmethod
     def from_config(cls, config) -> 'CommandManager':
@@ -335,7 +1020,12 @@ class CommandManager(object):
         except KeyError as e:
             raise CMManagerConfigurationError(f"Invalid configuration provided: missing {e} in dict!") from None
         sim = config.get("simulation", False)
-        return cls(command_configs, devices, simulation=sim)
+        use_reactor = config.get("reactor", False)
+        discovery_cache = config.get("discovery_cache")
+        lazy = config.get("lazy", False)
+        prefetch = config.get("prefetch", False)
+        return cls(command_configs, devices, simulation=sim, use_reactor=use_reactor, discovery_cache=discovery_cache,
+                   lazy=lazy, prefetch=prefetch)
 
     @classmethod
     def from_configfile(cls, configfile: str, simulation: Optional[bool] = None) -> 'CommandManager':
@@ -478,6 +1168,164 @@ class CommandBonjour(object):
                 return handler, bonjour_id, elapsed
         raise CMBonjourTimeout(command_id)
 
+    def detect_devices(self, command_ids: List[str], timeout: float = DEFAULT_DISCOVERY_TIMEOUT,
+                       n_rounds: int = DEFAULT_DISCOVERY_ROUNDS,
+                       candidates: Optional[Dict[str, List[GenericCommandHandler]]] = None
+                       ) -> Dict[str, Tuple[GenericCommandHandler, str, float]]:
+        """
+        Detects many Bonjour devices at once.
+
+        The probes of all devices are broadcast to all handlers together, and replies are matched
+        to devices by their command id. The probes are written in chunks of DEFAULT_PROBE_WRITE_SIZE
+        bytes at most, so that a board busy elsewhere does not overflow its receive buffer. Each chunk
+        is sent once the replies to the previous one arrived, or after DEFAULT_PROBE_WRITE_INTERVAL.
+        Devices that have not replied are probed again, up to n_rounds times.
+
+        Args:
+            command_ids: The IDs of the devices.
+
+            timeout: Time to wait for the replies of each round, default set to DEFAULT_DISCOVERY_TIMEOUT (0.5)
+
+            n_rounds: Number of broadcasts, default set to DEFAULT_DISCOVERY_ROUNDS (2)
+
+            candidates: Handlers to probe per command id, default set to None (all handlers).
+
+        Returns:
+            (handler, bonjour_id, elapsed) per command id, devices not found are missing.
+
+        """
+        if candidates is None:
+            candidates = {command_id: self.commandhandlers for command_id in command_ids}
+        start_time = time.monotonic()
+        found: Dict[str, Tuple[GenericCommandHandler, str, float]] = {}
+        replied = threading.Condition()
+
+        def handle_bonjour(handler, command_id, cmd):
+            # Relays receive the command without its id, e.g. "BONJOUR,SERVO;"
+            cmd_list = cmd.strip().strip(handler.term).split(handler.delim)
+            if cmd_list[0] == COMMAND_BONJOUR and len(cmd_list) > 1 and cmd_list[1]:
+                with replied:
+                    if command_id not in found:
+                        found[command_id] = (handler, cmd_list[1], time.monotonic() - start_time)
+                    replied.notify_all()
+
+        relays = []
+        for command_id in command_ids:
+            for handler in candidates.get(command_id, []):
+                relay = functools.partial(handle_bonjour, handler, command_id)
+                handler.add_relay(command_id, relay)
+                relays.append((handler, command_id, relay))
+        try:
+            for _ in range(n_rounds):
+                missing: Dict[GenericCommandHandler, List[str]] = {}
+                for command_id in command_ids:
+                    if command_id not in found:
+                        for handler in candidates.get(command_id, []):
+                            missing.setdefault(handler, []).append(command_id)
+                if not missing:
+                    break
+                chunks = {handler: self.forge_probes(handler, handler_command_ids)
+                          for handler, handler_command_ids in missing.items()}
+                for i in range(max(len(handler_chunks) for handler_chunks in chunks.values())):
+                    probed: List[str] = []
+                    for handler, handler_chunks in chunks.items():
+                        if i >= len(handler_chunks):
+                            continue
+                        probes, chunk_command_ids = handler_chunks[i]
+                        self.logger.debug('Scanning for %s at "%s"...', chunk_command_ids, handler.name)
+                        try:
+                            handler.write(probes)
+                        except CMCommunicationError as e:
+                            self.logger.warning('Cannot scan "%s": %s', handler.name, e)
+                            del handler_chunks[i + 1:]
+                            continue
+                        probed.extend(chunk_command_ids)
+                    if any(i + 1 < len(handler_chunks) for handler_chunks in chunks.values()):
+                        with replied:
+                            replied.wait_for(lambda: all(command_id in found for command_id in probed),
+                                             DEFAULT_PROBE_WRITE_INTERVAL)
+                with replied:
+                    replied.wait_for(lambda: all(command_id in found for command_id in command_ids
+                                                 if candidates.get(command_id)), timeout)
+        finally:
+            for handler, command_id, relay in relays:
+                handler.remove_relay(command_id, relay)
+        return found
+
+    @staticmethod
+    def forge_probes(handler: GenericCommandHandler, command_ids: List[str],
+                     max_size: int = DEFAULT_PROBE_WRITE_SIZE) -> List[Tuple[bytes, List[str]]]:
+        """
+        Forges the bonjour probes of devices, in chunks to be written one at a time.
+
+        Args:
+            handler: The handler the probes are written to.
+
+            command_ids: The IDs of the devices.
+
+            max_size: Largest chunk, default set to DEFAULT_PROBE_WRITE_SIZE (64). A longer probe is a chunk alone.
+
+        Returns:
+            The probes and the IDs of their devices, per chunk.
+        """
+        chunks: List[Tuple[bytes, List[str]]] = []
+        start = 0
+        for probes, count in chunk_commands([handler.forge_command_bytes(command_id, COMMAND_BONJOUR)
+                                             for command_id in command_ids], max_size):
+            chunks.append((probes, command_ids[start:start + count]))
+            start += count
+        return chunks
+
+
+def chunk_commands(commands: List[bytes], max_size: int = DEFAULT_PROBE_WRITE_SIZE) -> List[Tuple[bytes, int]]:
+    """
+    Joins commands in chunks to be written one at a time, so that a write fits the receive buffer of a board.
+
+    Args:
+        commands: The commands, in the order to write them.
+
+        max_size: Largest chunk, default set to DEFAULT_PROBE_WRITE_SIZE (64). A longer command is a chunk alone.
+
+    Returns:
+        The chunks and their number of commands.
+    """
+    chunks: List[Tuple[bytes, int]] = []
+    chunk = bytearray()
+    count = 0
+    for command in commands:
+        if count and len(chunk) + len(command) > max_size:
+            chunks.append((bytes(chunk), count))
+            chunk = bytearray()
+            count = 0
+        chunk += command
+        count += 1
+    if count:
+        chunks.append((bytes(chunk), count))
+    return chunks
+
+
+class LazyDevices(dict):
+    """
+    Devices of a CommandManager in lazy mode, registering a device on its first access as devices[name].
+
+    Only item access registers devices, membership tests and iteration only see the registered ones.
+
+    Args:
+        manager: The manager owning the devices.
+    """
+    def __init__(self, manager: CommandManager):
+        dict.__init__(self)
+        self.manager = manager
+
+    def __missing__(self, device_name: str) -> Any:
+        with self.manager._lazy_lock:
+            # The device may have been registered by another thread since the lookup
+            if dict.__contains__(self, device_name):
+                return dict.__getitem__(self, device_name)
+            if device_name not in self.manager.lazy_devices:
+                raise KeyError(device_name)
+            return self.manager.register_lazy_device(device_name)
+
 
 class VirtualAttribute:
     """ Callable attribute for virtual device
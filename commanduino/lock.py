@@ -15,28 +15,39 @@ class Lock(object):
     """
     Represents the Threading locks to be used throughout this library.
 
+    Waiters are notified as soon as the lock is released, no polling is involved.
+
     Args:
         timeout (int): Time to wait until timeout, default set to 1.
 
-        sleep_time (float): Time to wait, default set to 0.001.
+        sleep_time (float): Unused, kept for backwards compatibility, default set to 0.001.
 
     """
     def __init__(self, timeout=1, sleep_time=0.001):
         self.lock = threading.Lock()
+        self.released = threading.Condition()
         self.timeout = timeout
         self.sleep_time = sleep_time
 
-    def acquire(self):
+    def acquire(self, blocking=True):
         """
         Acquires a lock.
+
+        Args:
+            blocking (bool): Waits for the lock to be released if it is locked, default set to True.
+
+        Returns:
+            True if the lock was acquired.
         """
-        return self.lock.acquire()
+        return self.lock.acquire(blocking)
 
     def release(self):
         """
         Releases a lock.
         """
-        self.lock.release()
+        with self.released:
+            self.lock.release()
+            self.released.notify_all()
 
     def locked(self):
         """
@@ -59,18 +70,15 @@ class Lock(object):
             elapsed (float): Time taken to complete.
 
         """
-        elapsed = 0
-        start_time = time.time()
-        while self.locked():
-            time.sleep(self.sleep_time)
-            elapsed = time.time() - start_time
-            if elapsed > self.timeout:
-                return False, elapsed
-        return True, elapsed
+        start_time = time.monotonic()
+        with self.released:
+            is_released = self.released.wait_for(lambda: not self.locked(), self.timeout)
+        return is_released, time.monotonic() - start_time
 
     def ensure_released(self):
         """
         Forces unlocking of a locked thread.
         """
-        if self.locked():
-            self.release()
+        with self.released:
+            if self.locked():
+                self.release()
@@ -0,0 +1,134 @@
+"""
+
+.. module:: reactor
+   :platform: Unix
+   :synopsis: Reads the incoming data of many command handlers from a single thread.
+
+"""
+import selectors
+import threading
+import logging
+from typing import List, Tuple
+
+from .commandhandler import StopSignal, GenericCommandHandler
+from .exceptions import CMError, CMHandlerConfigurationError
+
+
+class CommandReactor(threading.Thread):
+    """
+    Single I/O thread owning the links of several command handlers.
+
+    Registered handlers are not started as threads of their own. The reactor waits on
+    all their links at once and hands the incoming data to each handler, whose
+    callbacks are therefore run from the reactor thread.
+    A callback blocking on a reply from a board would stall every handler, it has to
+    be called from another thread. A callback raising an exception is logged and its
+    frame dropped, the other frames and handlers are still processed.
+    """
+    def __init__(self):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.name = self.__class__.__name__
+
+        self.logger = logging.getLogger(__name__).getChild(self.__class__.__name__)
+
+        self.interrupted = threading.Event()
+        self._selector = selectors.DefaultSelector()
+        self._wakeup = StopSignal()
+        self._selector.register(self._wakeup, selectors.EVENT_READ)
+
+        # (handler, add) changes to the selector, applied by the reactor thread
+        self._pending: List[Tuple[GenericCommandHandler, bool]] = []
+        self._pending_lock = threading.Lock()
+
+    def register(self, handler: GenericCommandHandler) -> None:
+        """
+        Hands the reading of a handler's link over to the reactor.
+
+        Args:
+            handler: The handler to read for, it must not be started.
+
+        Raises:
+            CMHandlerConfigurationError: The link cannot be waited on (e.g. serial ports on Windows).
+
+        """
+        try:
+            handler.fileno()
+        except (AttributeError, OSError, ValueError) as e:
+            raise CMHandlerConfigurationError(f"{handler.name} cannot be read by the reactor! {e}") from None
+        handler.reactor = self
+        self._schedule(handler, True)
+        self.logger.debug('Registered %s', handler.name)
+
+    def unregister(self, handler: GenericCommandHandler) -> None:
+        """
+        Stops reading for a handler and closes its link.
+
+        Args:
+            handler: The handler to remove.
+
+        """
+        self._schedule(handler, False)
+        self.logger.debug('Unregistering %s', handler.name)
+
+    def stop(self) -> None:
+        """
+        Stops the reactor and closes the links of all its handlers.
+        """
+        self.interrupted.set()
+        self._wakeup.set()
+
+    def _schedule(self, handler: GenericCommandHandler, add: bool) -> None:
+        """
+        Queues a change to the selector and wakes the reactor thread up to apply it.
+        """
+        with self._pending_lock:
+            self._pending.append((handler, add))
+        self._wakeup.set()
+
+    def _apply_pending(self) -> None:
+        """
+        Applies the queued changes to the selector, from the reactor thread.
+        """
+        self._wakeup.clear()
+        with self._pending_lock:
+            pending, self._pending = self._pending, []
+        for handler, add in pending:
+            if add:
+                self._selector.register(handler, selectors.EVENT_READ)
+            else:
+                try:
+                    self._selector.unregister(handler)
+                except KeyError:
+                    continue  # already removed
+                handler.close()
+
+    def run(self) -> None:
+        """
+        Waits on all registered links and processes the incoming data.
+        """
+        while not self.interrupted.is_set():
+            for key, _ in self._selector.select():
+                if key.fileobj is self._wakeup:
+                    self._apply_pending()
+                    continue
+                handler = key.fileobj
+                process = handler.process_incoming
+                while process is not None:
+                    try:
+                        process()
+                        process = None
+                    except CMError as e:
+                        self.logger.error('Error reading from %s, removing it: %s', handler.name, e)
+                        self.unregister(handler)
+                        process = None
+                    except Exception:
+                        # Raised by a callback, e.g. on a garbled reply: its frame is dropped and
+                        # the frames received after it are handled
+                        self.logger.exception('Error handling a frame from %s, dropping it', handler.name)
+                        process = handler.handle_buffer
+        for key in list(self._selector.get_map().values()):
+            if key.fileobj is not self._wakeup:
+                key.fileobj.close()
+        self._selector.close()
+        self._wakeup.close()
@@ -0,0 +1,121 @@
+"""
+
+.. module:: startuptrace
+   :platform: Unix
+   :synopsis: Records the timeline of the start of a CommandManager.
+
+"""
+import time
+import threading
+from typing import Any, Dict, List, Optional
+
+
+class StartupTrace(object):
+    """
+    Timeline of the start of a CommandManager, to find out where a slow start spends its time.
+
+    All durations are in seconds. The records are plain dictionaries, filled as the start
+    goes on, possibly from several threads:
+
+    * phases: duration per start phase, i.e. "handlers", "discovery", "devices" and "total".
+    * handlers: per handler name, "open" (time to open the link), "first_byte" (time from the
+      opening to the first byte received), "init" (time waited for the board to init),
+      "init_requests" (number of ISINIT sent), "init_round_trip" (time from the last ISINIT to
+      its reply) and "initialised".
+    * devices: per device name, "command_id", "handler", "bonjour_id", "discovery" (bonjour
+      latency, 0 when not probed) and "init" (duration of the device init()).
+    """
+    def __init__(self):
+        self.start_time = time.monotonic()
+        self.phases: Dict[str, float] = {}
+        self.handlers: Dict[str, Dict[str, Any]] = {}
+        self.devices: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def record_phase(self, phase: str, duration: float) -> None:
+        """
+        Records the duration of a start phase.
+
+        Args:
+            phase: Name of the phase.
+
+            duration: Duration of the phase.
+
+        """
+        with self._lock:
+            self.phases[phase] = duration
+
+    def record_handler(self, name: str, **fields) -> None:
+        """
+        Adds fields to the record of a handler.
+
+        Args:
+            name: Name of the handler.
+
+            **fields: The fields to set.
+
+        """
+        with self._lock:
+            self.handlers.setdefault(name, {}).update(fields)
+
+    def record_device(self, name: str, **fields) -> None:
+        """
+        Adds fields to the record of a device.
+
+        Args:
+            name: Name of the device.
+
+            **fields: The fields to set.
+
+        """
+        with self._lock:
+            self.devices.setdefault(name, {}).update(fields)
+
+    def finish(self) -> None:
+        """
+        Records the total duration of the start.
+        """
+        self.record_phase("total", time.monotonic() - self.start_time)
+
+    def as_dict(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns a copy of the timeline, e.g. to be dumped as JSON.
+        """
+        with self._lock:
+            return {"phases": dict(self.phases),
+                    "handlers": {name: dict(record) for name, record in self.handlers.items()},
+                    "devices": {name: dict(record) for name, record in self.devices.items()}}
+
+    def report(self) -> str:
+        """
+        Formats the timeline as a human readable report, devices sorted from the slowest to init.
+        """
+        trace = self.as_dict()
+        lines: List[str] = ["Startup timeline:"]
+        for phase, duration in trace["phases"].items():
+            lines.append(f"  {phase:<10} {_seconds(duration)}")
+
+        lines.append("Handlers:")
+        for name, record in trace["handlers"].items():
+            line = f"  {name}: open {_seconds(record.get('open'))}, first byte {_seconds(record.get('first_byte'))}"
+            if "init" in record:
+                line += (f", init {_seconds(record['init'])} ({record.get('init_requests', 0)} ISINIT, "
+                         f"last round trip {_seconds(record.get('init_round_trip'))})")
+            if not record.get("initialised", False):
+                line += ", not initialised"
+            lines.append(line)
+
+        lines.append("Devices:")
+        devices = sorted(trace["devices"].items(), key=lambda item: item[1].get("init", 0), reverse=True)
+        for name, record in devices:
+            lines.append(f"  {name} (ID=<{record.get('command_id', '')}> type=<{record.get('bonjour_id', '')}>) "
+                         f"on {record.get('handler', '?')}: bonjour {_seconds(record.get('discovery'))}, "
+                         f"init {_seconds(record.get('init'))}")
+        return "\n".join(lines)
+
+
+def _seconds(duration: Optional[float]) -> str:
+    """
+    Formats a duration of the report, "-" when it was not recorded.
+    """
+    return "-" if duration is None else f"{duration:.3f} s"